@@ -0,0 +1,107 @@
+"""
+Contention benchmark for ThreadSafeOrderBook
+
+Runs the same number of operations split between N writer threads: every writer
+adds offers of its own trade type and purges them, keeping a window of resting
+offers. One more thread takes snapshots until the writers are finished.
+Prints operations per second of writers and number of snapshots.
+
+Every snapshot of a changed order book rebuilds the views of both sides under
+both locks, which blocks all writers for O(window * threads). So throughput
+of writers includes the cost of snapshots, which grows with --window.
+
+Usage:
+    PYTHONPATH=src python benchmarks/contention_benchmark.py --threads 1 2 4 8
+"""
+
+import argparse
+from collections import deque
+import json
+from threading import Barrier, Event, Thread
+from time import perf_counter
+from typing import Dict
+
+from order_book.threadsafe import ThreadSafeOrderBook
+
+
+def measure(threads: int, operations: int, window: int) -> Dict[str, float]:
+    """
+    Measure throughput of order book shared by threads.
+
+    :param threads: number of writer threads
+    :type: Integer
+
+    :param operations: total number of add_offer and purge_offer calls
+    :type: Integer
+
+    :param window: number of resting offers of every writer
+    :type: Integer
+
+    :return: operations per second and number of snapshots
+    :rtype: Dictionary
+    """
+    book = ThreadSafeOrderBook(depth=threads * window + 1)
+    per_thread = operations // threads // 2
+    barrier = Barrier(threads + 2)
+    finished = Event()
+    snapshots = 0
+
+    def write(index: int) -> None:
+        trade_type = 'asks' if index % 2 else 'bids'
+        add_offer = book.add_offer
+        purge_offer = book.purge_offer
+        resting = deque()
+        barrier.wait()
+
+        for number in range(per_thread):
+            resting.append(add_offer(trade_type, 100 + number % 50, 1))
+
+            if len(resting) == window:
+                purge_offer(resting.popleft())
+
+    def read() -> None:
+        nonlocal snapshots
+        barrier.wait()
+
+        while not finished.is_set():
+            book.get_market_snapshot()
+            snapshots += 1
+
+    writers = [Thread(target=write, args=(index,)) for index in range(threads)]
+    reader = Thread(target=read)
+    for thread in writers + [reader]:
+        thread.start()
+
+    barrier.wait()
+    started = perf_counter()
+    for writer in writers:
+        writer.join()
+    elapsed = perf_counter() - started
+
+    finished.set()
+    reader.join()
+
+    total = per_thread * threads * 2
+
+    return {
+        'threads': threads,
+        'operations': total,
+        'seconds': round(elapsed, 4),
+        'operations_per_second': round(total / elapsed),
+        'snapshots': snapshots,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--operations', type=int, default=100000)
+    parser.add_argument('--window', type=int, default=100)
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        print(json.dumps(measure(threads, args.operations, args.window)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark suite for OrderBook hot paths
+
+Measures add_offer, purge_offer, get_offers_data and get_market_snapshot
+for every storage engine, book depth and order mix, and prints one JSON
+object per case. All cases are run once to warm up and then --repeats times
+in turn, the fastest round of every hot path is reported. Results of a previous
+run can be passed with --compare to report cases, which became slower than the threshold.
+
+Usage:
+    PYTHONPATH=src python benchmarks/hot_paths_benchmark.py --output results.json
+    PYTHONPATH=src python benchmarks/hot_paths_benchmark.py --compare results.json
+"""
+
+import argparse
+import json
+from random import randint, random, seed, shuffle
+import sys
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from order_book.depth_of_market import OrderBook, STORAGES
+
+
+DEPTHS = (100, 1000, 10000, 100000)
+
+# name -> share of asks, number of distinct price ticks
+ORDER_MIXES = {
+    'balanced_narrow': (0.5, 10),
+    'balanced_wide': (0.5, 10000),
+    'asks_heavy': (0.9, 100),
+}
+
+SNAPSHOT_REPEATS = 5
+
+# measured rounds of every case, the fastest round is reported
+REPEATS = 5
+
+# ladder storage needs the range of generated prices
+BOOK_OPTIONS = {
+    'ladder': {'tick_size': 0.01, 'price_range': (100, 100 + max(ticks for _, ticks in ORDER_MIXES.values()) / 100)},
+}
+
+
+def generate_offers(count: int, asks_share: float, ticks: int) -> List[Tuple[str, float, int]]:
+    """
+    Generate offers for one order mix.
+
+    :param count: number of offers
+    :type: Integer
+
+    :param asks_share: share of asks among offers
+    :type: Float
+
+    :param ticks: number of distinct prices
+    :type: Integer
+
+    :return: list of trade type, price and quantity
+    :rtype: List
+    """
+    seed(count + ticks)
+
+    return [
+        ('asks' if random() < asks_share else 'bids', 100 + randint(0, ticks) / 100, randint(1, 1000))
+        for _ in range(count)
+    ]
+
+
+def timed(function: Callable[[], None]) -> float:
+    started = perf_counter()
+    function()
+    return perf_counter() - started
+
+
+def run_round(storage: str, offers: List[Tuple[str, float, int]], item_ids: List[int]) -> Dict[str, float]:
+    """
+    Measure hot paths of one new order book filled with the offers.
+
+    :return: seconds spent by every hot path
+    :rtype: Dictionary
+    """
+    book = OrderBook(depth=len(offers), storage=storage, **BOOK_OPTIONS.get(storage, {}))
+
+    add_offer = book.add_offer
+    get_offers_data = book.get_offers_data
+    purge_offer = book.purge_offer
+
+    def add_all() -> None:
+        for trade_type, price, quantity in offers:
+            add_offer(trade_type, price, quantity)
+
+    def get_all() -> None:
+        for item_id in item_ids:
+            get_offers_data(item_id)
+
+    def snapshot_all() -> None:
+        for _ in range(SNAPSHOT_REPEATS):
+            book.get_market_snapshot()
+
+    def purge_all() -> None:
+        for item_id in item_ids:
+            purge_offer(item_id)
+
+    return {
+        'add_offer': timed(add_all),
+        'get_offers_data': timed(get_all),
+        'get_market_snapshot': timed(snapshot_all),
+        'purge_offer': timed(purge_all),
+    }
+
+
+def run_cases(cases: List[Tuple[str, int, str]], repeats: int = REPEATS) -> List[Dict[str, object]]:
+    """
+    Measure hot paths of order books of every case.
+    Rounds are interleaved between the cases, so a slowdown of the machine affects
+    one round of every case instead of all rounds of one case. The first round warms up
+    and is not measured, the fastest of the next rounds is reported for every hot path.
+
+    :param cases: storage, depth and order mix of every case
+    :type: List
+
+    :param repeats: number of measured rounds
+    :type: Integer
+
+    :return: nanoseconds per operation of every hot path of every case
+    :rtype: List
+    """
+    inputs = {}
+
+    for _, depth, mix in cases:
+        if (depth, mix) not in inputs:
+            asks_share, ticks = ORDER_MIXES[mix]
+            item_ids = list(range(1, depth + 1))
+            offers = generate_offers(depth, asks_share, ticks)
+            shuffle(item_ids)
+            inputs[depth, mix] = offers, item_ids
+
+    best: Dict[Tuple[str, int, str], Dict[str, float]] = {}
+
+    for number in range(repeats + 1):
+        for case in cases:
+            storage, depth, mix = case
+            seconds = run_round(storage, *inputs[depth, mix])
+
+            if number:
+                previous = best.setdefault(case, seconds)
+                best[case] = {path: min(value, previous[path]) for path, value in seconds.items()}
+
+    results = []
+
+    for storage, depth, mix in cases:
+        seconds = best[storage, depth, mix]
+        results.append({
+            'case': f'{storage}/{depth}/{mix}',
+            'storage': storage,
+            'depth': depth,
+            'mix': mix,
+            'add_offer_ns': round(seconds['add_offer'] / depth * 1e9),
+            'get_offers_data_ns': round(seconds['get_offers_data'] / depth * 1e9),
+            'get_market_snapshot_ns': round(seconds['get_market_snapshot'] / SNAPSHOT_REPEATS * 1e9),
+            'purge_offer_ns': round(seconds['purge_offer'] / depth * 1e9),
+        })
+
+    return results
+
+
+def compare(results: List[Dict[str, object]], baseline: List[Dict[str, object]], threshold: float) -> List[str]:
+    """
+    Find hot paths, which are slower than in baseline by more than threshold.
+
+    :return: descriptions of regressions
+    :rtype: List
+    """
+    baseline_cases = {result['case']: result for result in baseline}
+    regressions = []
+
+    for result in results:
+        previous = baseline_cases.get(result['case'])
+        if previous is None:
+            continue
+
+        for key, value in result.items():
+            if key.endswith('_ns') and previous.get(key) and value > previous[key] * (1 + threshold):
+                regressions.append(f"{result['case']} {key}: {previous[key]} -> {value}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depths', type=int, nargs='+', default=list(DEPTHS))
+    parser.add_argument('--storages', nargs='+', default=list(STORAGES), choices=list(STORAGES))
+    parser.add_argument('--mixes', nargs='+', default=list(ORDER_MIXES), choices=list(ORDER_MIXES))
+    parser.add_argument('--output', help='write results to JSON file')
+    parser.add_argument('--compare', help='JSON file with results of a previous run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown. Default: 0.2')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help=f'measured rounds. Default: {REPEATS}')
+    args = parser.parse_args()
+
+    cases = [(storage, depth, mix) for storage in args.storages for depth in args.depths for mix in args.mixes]
+
+    results = run_cases(cases, args.repeats)
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Throughput benchmark for OrderBook matching mode
+
+Sends the same random order flow into a matching order book for every storage
+engine and prints orders per second and the number of fills.
+
+Usage:
+    PYTHONPATH=src python benchmarks/matching_benchmark.py --orders 200000
+"""
+
+import argparse
+import json
+from random import randint, seed
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from order_book.depth_of_market import OrderBook, STORAGES
+
+
+def generate_orders(count: int, spread: int) -> List[Tuple[str, int, int]]:
+    """
+    Generate random orders around the same mid price.
+
+    :param count: number of orders
+    :type: Integer
+
+    :param spread: maximum distance from the mid price in ticks
+    :type: Integer
+
+    :return: list of trade type, price and quantity
+    :rtype: List
+    """
+    seed(0)
+
+    return [
+        ('asks' if randint(0, 1) else 'bids', 1000 + randint(-spread, spread), randint(1, 100))
+        for _ in range(count)
+    ]
+
+
+def measure(storage: str, orders: List[Tuple[str, int, int]], spread: int) -> Dict[str, float]:
+    """
+    Measure throughput of matching order book.
+
+    :param storage: storage engine of order book
+    :type: String
+
+    :param orders: orders to be added
+    :type: List
+
+    :param spread: maximum distance from the mid price, used as price range of ladder storage
+    :type: Integer
+
+    :return: orders per second and number of fills
+    :rtype: Dictionary
+    """
+    options = {'price_range': (1000 - spread, 1000 + spread)} if storage == 'ladder' else {}
+    book = OrderBook(depth=len(orders), storage=storage, matching=True, **options)
+    add_offer = book.add_offer
+    fills = 0
+
+    started = perf_counter()
+    for trade_type, price, quantity in orders:
+        fills += len(add_offer(trade_type, price, quantity).fills)
+    elapsed = perf_counter() - started
+
+    return {
+        'storage': storage,
+        'orders': len(orders),
+        'fills': fills,
+        'seconds': round(elapsed, 4),
+        'orders_per_second': round(len(orders) / elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--spread', type=int, default=20)
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders, args.spread)
+
+    for storage in STORAGES:
+        print(json.dumps(measure(storage, orders, args.spread)))
+
+
+if __name__ == '__main__':
+    main()
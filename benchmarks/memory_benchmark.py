@@ -0,0 +1,88 @@
+"""
+Memory benchmark for OrderBook storages
+
+Fills order books with the same random offers using every storage engine
+and prints the memory allocated per resting offer.
+
+Usage:
+    PYTHONPATH=src python benchmarks/memory_benchmark.py --offers 200000
+"""
+
+import argparse
+import gc
+import json
+from random import randint, random, seed
+import tracemalloc
+from typing import Dict, List, Tuple
+
+from order_book.depth_of_market import OrderBook, STORAGES
+
+
+# ladder storage needs the range of generated prices
+BOOK_OPTIONS = {
+    'ladder': {'tick_size': 0.01, 'price_range': (100, 110)},
+}
+
+
+def generate_offers(count: int) -> List[Tuple[str, float, int]]:
+    """
+    Generate random offers for both trade types.
+
+    :param count: number of offers
+    :type: Integer
+
+    :return: list of trade type, price and quantity
+    :rtype: List
+    """
+    seed(0)
+
+    return [
+        ('asks' if index % 2 else 'bids', round(100 + random() * 10, 2), randint(1, 1000))
+        for index in range(count)
+    ]
+
+
+def measure(storage: str, offers: List[Tuple[str, float, int]]) -> Dict[str, float]:
+    """
+    Measure memory allocated by order book filled with offers.
+
+    :param storage: storage engine of order book
+    :type: String
+
+    :param offers: offers to be added
+    :type: List
+
+    :return: total and per offer allocated bytes
+    :rtype: Dictionary
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    book = OrderBook(depth=len(offers), storage=storage, **BOOK_OPTIONS.get(storage, {}))
+    for trade_type, price, quantity in offers:
+        book.add_offer(trade_type, price, quantity)
+
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'storage': storage,
+        'offers': len(offers),
+        'bytes': allocated,
+        'bytes_per_offer': round(allocated / len(offers), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--offers', type=int, default=100000)
+    args = parser.parse_args()
+
+    offers = generate_offers(args.offers)
+
+    for storage in STORAGES:
+        print(json.dumps(measure(storage, offers)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark of offer validation overhead
+
+Adds the same valid offers into order books with add_offer, which validates
+every offer, and with add_trusted_offer, which skips validation, and prints
+nanoseconds per offer of both paths and the overhead saved by trusted path.
+Rounds of both paths are interleaved after one warmup round, and the fastest
+round is reported.
+
+saved_ns is a difference of two timings of whole placement, so it is noisy,
+especially in matching mode. validation_ns times the checks of add_offer alone:
+calls of OrderBook._validate_offer less calls of an empty function.
+
+Usage:
+    PYTHONPATH=src python benchmarks/validation_benchmark.py --offers 200000
+"""
+
+import argparse
+import gc
+import json
+from random import randint, random, seed
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from order_book.depth_of_market import OrderBook
+
+
+# book options -> price of generated offers
+CASES = {
+    'dict': ({}, lambda: round(100 + random() * 10, 2)),
+    'matching': ({'matching': True}, lambda: randint(90, 110)),
+    'tick_size': ({'tick_size': 0.01}, lambda: round(100 + random() * 10, 2)),
+}
+
+
+def generate_offers(count: int, price: Callable[[], float]) -> List[Tuple[str, float, int]]:
+    """
+    Generate random valid offers for both trade types.
+
+    :param count: number of offers
+    :type: Integer
+
+    :param price: generator of offer prices
+    :type: Callable
+
+    :return: list of trade type, price and quantity
+    :rtype: List
+    """
+    seed(0)
+
+    return [('asks' if index % 2 else 'bids', price(), randint(1, 1000)) for index in range(count)]
+
+
+def _noop(trade_type: str, price: float, quantity: int) -> None:
+    pass
+
+
+def measure(case: str, count: int, repeats: int) -> Dict[str, object]:
+    """
+    Measure add_offer, add_trusted_offer and validation alone on the same offers.
+    Rounds of both paths are interleaved and preceded by one warmup round, which is not measured.
+
+    :param case: name of order book options
+    :type: String
+
+    :param count: number of offers
+    :type: Integer
+
+    :param repeats: number of measurements, the fastest one is reported
+    :type: Integer
+
+    :return: nanoseconds per offer of both paths and of validation
+    :rtype: Dictionary
+    """
+    options, price = CASES[case]
+    offers = generate_offers(count, price)
+    methods = ['add_offer', 'add_trusted_offer']
+    best: Dict[str, float] = {}
+
+    def place(method: str) -> float:
+        book = OrderBook(depth=count, **options)
+        add = getattr(book, method)
+
+        started = perf_counter()
+        for trade_type, offer_price, quantity in offers:
+            add(trade_type, offer_price, quantity)
+
+        return perf_counter() - started
+
+    def call(function: Callable[[str, float, int], None]) -> float:
+        started = perf_counter()
+        for trade_type, offer_price, quantity in offers:
+            function(trade_type, offer_price, quantity)
+
+        return perf_counter() - started
+
+    validate_offer = OrderBook(**options)._validate_offer
+
+    # collection of lots of one path would slow down the other one, so it is disabled while timing, as by timeit
+    gc.disable()
+
+    try:
+        for number in range(repeats + 1):
+            # the path measured first alternates between rounds
+            timings = {method: place(method) for method in (methods if number % 2 else methods[::-1])}
+            timings['validation'] = call(validate_offer) - call(_noop)
+
+            if number:
+                for name, seconds in timings.items():
+                    best[name] = min(best.get(name, seconds), seconds)
+
+            gc.collect()
+
+    finally:
+        gc.enable()
+
+    return {
+        'case': case,
+        'offers': count,
+        'add_offer_ns': round(best['add_offer'] / count * 1e9),
+        'add_trusted_offer_ns': round(best['add_trusted_offer'] / count * 1e9),
+        'saved_ns': round((best['add_offer'] - best['add_trusted_offer']) / count * 1e9),
+        'validation_ns': round(best['validation'] / count * 1e9),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--offers', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    args = parser.parse_args()
+
+    for case in args.cases:
+        print(json.dumps(measure(case, args.offers, args.repeats)))
+
+
+if __name__ == '__main__':
+    main()
@@ -12,4 +12,8 @@ setup(
 
     packages=find_packages(where='src'),
     package_dir={'': 'src'},
+
+    extras_require={
+        'numpy': ['numpy'],
+    },
 )
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Module with asyncio front-end for Order Book project
+
+AsyncOrderBook queues offers and cancellations submitted by coroutines and
+applies them to the order book in micro-batches: all commands submitted during
+one event loop iteration are applied together on the next one. Every command
+resolves its future with the result of the order book method.
+
+After a micro-batch has changed the order book, its market view is published
+to subscribers. A subscriber is an async iterator of market views, which keeps
+only the latest views if the consumer is slower than the order book.
+"""
+
+import asyncio
+from typing import Any, Callable, List, Optional, Set, Tuple, Union
+
+from order_book.depth_of_market import MarketView, OrderBook
+from order_book.exceptions import ParamTypeException, ParamValueException
+
+
+# put into the queue of a closed subscription to wake up its consumer
+CLOSED = object()
+
+
+class Subscription:
+    """Describes an async iterator of market views"""
+
+    def __init__(self, owner: 'AsyncOrderBook', max_pending: int) -> None:
+        """
+        Init a new subscription.
+
+        :param owner: front-end publishing market views
+        :type: AsyncOrderBook
+
+        :param max_pending: number of views kept for the consumer. Older views are dropped
+        :type: Integer
+        """
+        self._owner = owner
+        self._queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self._closed: bool = False
+
+    def _publish(self, market_view: MarketView) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+
+        self._queue.put_nowait(market_view)
+
+    def close(self) -> None:
+        """
+        Stop receiving market views. Iteration stops after the views already received.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        self._owner._subscriptions.discard(self)
+        self._publish(CLOSED)
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> MarketView:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+
+        market_view = await self._queue.get()
+
+        if market_view is CLOSED:
+            raise StopAsyncIteration
+
+        return market_view
+
+
+class AsyncOrderBook:
+    """Describes an asyncio front-end of an order book"""
+
+    def __init__(self, book: Optional[OrderBook] = None, **book_options: Any) -> None:
+        """
+        Init a new front-end.
+
+        :param book: order book to be changed. Default value: new OrderBook(**book_options)
+        :type: OrderBook
+
+        :param book_options: OrderBook parameters, e.g. depth or matching
+        :type: Dictionary
+        """
+        self.book: OrderBook = OrderBook(**book_options) if book is None else book
+
+        self._pending: List[Tuple[asyncio.Future, Callable, Tuple]] = []
+        self._scheduled: bool = False
+        self._subscriptions: Set[Subscription] = set()
+        self._published_version: int = self.book.version
+
+    def _submit(self, method: Callable, *args: Any) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.append((future, method, args))
+
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._apply_batch)
+
+        return future
+
+    def _apply_batch(self) -> None:
+        """
+        Apply all pending commands and publish market view if the order book is changed.
+        """
+        self._scheduled = False
+        batch, self._pending = self._pending, []
+
+        for future, method, args in batch:
+            if future.cancelled():
+                continue
+
+            try:
+                result = method(*args)
+
+            except Exception as error:
+                future.set_exception(error)
+
+            else:
+                future.set_result(result)
+
+        if self._subscriptions and self.book.version != self._published_version:
+            market_view = self.book.get_market_view()
+            self._published_version = market_view.version
+
+            for subscription in self._subscriptions:
+                subscription._publish(market_view)
+
+    def submit_offer(self, trade_type: str, price: Union[int, float], quantity: int) -> asyncio.Future:
+        """
+        Queue offer to be added on the next event loop iteration.
+
+        :return: future resolved with the result of OrderBook.add_offer
+        :rtype: Future
+        """
+        return self._submit(self.book.add_offer, trade_type, price, quantity)
+
+    def submit_cancel(self, item_id: int) -> asyncio.Future:
+        """
+        Queue offer to be purged on the next event loop iteration.
+
+        :return: future resolved with the result of OrderBook.purge_offer
+        :rtype: Future
+        """
+        return self._submit(self.book.purge_offer, item_id)
+
+    async def add_offer(self, trade_type: str, price: Union[int, float], quantity: int) -> Any:
+        """
+        Add offer in the order book with the next micro-batch.
+
+        :return: offer id. In matching mode - MatchResult
+        :rtype: [Integer, MatchResult]
+        """
+        return await self.submit_offer(trade_type, price, quantity)
+
+    async def purge_offer(self, item_id: int) -> dict:
+        """
+        Purge offer from the order book with the next micro-batch.
+
+        :return: Purged offer
+        :rtype: Dictionary
+        """
+        return await self.submit_cancel(item_id)
+
+    def subscribe(self, max_pending: int = 1) -> Subscription:
+        """
+        Subscribe to market views published after micro-batches.
+
+        :param max_pending: number of views kept for a slow consumer. Default value: 1
+        :type: Integer
+
+        :return: async iterator of market views
+        :rtype: Subscription
+        """
+        if type(max_pending) != int:
+            raise ParamTypeException
+
+        # queue of zero size is not bounded at all
+        if max_pending <= 0:
+            raise ParamValueException
+
+        subscription = Subscription(self, max_pending)
+        self._subscriptions.add(subscription)
+
+        return subscription
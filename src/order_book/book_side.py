@@ -0,0 +1,437 @@
+"""
+Module with one side (asks or bids) of the Order Book project
+
+BookSide behaves like a dictionary of offer id -> lot, where every lot is
+a dictionary with price and quantity. Besides the lots it keeps a PriceLevels
+index up to date, so the side can be walked in price-time priority.
+
+Sides of one order book share the offer sides index: offer id -> side,
+so the side of an offer is found with one lookup.
+
+Every change of the side increases its version. If the sides share a change
+log, every increase of the version appends one change to the log:
+(action, trade type, offer id, price, quantity), where action is one of
+ADD, PURGE and CHANGE (new quantity of the resting lot). The same change is
+written into the journal of the side, if it is attached. The side caches immutable
+views of its lots from the lowest and from the highest price, which are rebuilt
+only when the version has changed.
+
+Lots must not be changed in place: the index and the version are updated only
+when a lot is put into or removed from the side.
+
+CompactBookSide has the same interface, but keeps prices and quantities in
+parallel arrays instead of a dictionary per lot. Lots are materialized
+as dictionaries only when they are read.
+
+LadderBookSide keeps lots the same way as BookSide, but indexes them with
+PriceLadder for integer prices of a bounded range.
+"""
+
+from array import array
+from collections import deque, namedtuple
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from order_book.exceptions import ParamValueException
+from order_book.price_levels import PriceLadder, PriceLevels
+
+
+Lot = Dict[str, Union[int, float]]
+
+LotRecord = namedtuple('LotRecord', ['offer_id', 'price', 'quantity'])
+
+# quantities are kept in signed 64-bit arrays by compact and ladder storages, state and journal files
+MAX_QUANTITY = 2 ** 63 - 1
+
+ADD = 'add'
+PURGE = 'purge'
+CHANGE = 'change'
+# fully executed offer, which was never placed. Written only into the journal
+EXECUTE = 'execute'
+
+
+class BookSide(MutableMapping):
+    """Describes one side of an order book"""
+
+    def __init__(
+        self,
+        trade_type: str = None,
+        offer_sides: Dict[int, 'BookSide'] = None,
+        changes: Optional[deque] = None
+        ) -> None:
+        """
+        Init a new empty side.
+
+        :param trade_type: name of the side
+        :type: String
+
+        :param offer_sides: offer id -> side index shared by sides of one order book
+        :type: Dictionary
+
+        :param changes: change log shared by sides of one order book
+        :type: deque
+        """
+        self.trade_type: Optional[str] = trade_type
+        self.offer_sides: Dict[int, BookSide] = {} if offer_sides is None else offer_sides
+        self.changes: Optional[deque] = changes
+        self.journal = None
+
+        self.lots: Dict[int, Lot] = {}
+        self.levels: PriceLevels = PriceLevels()
+
+        self.version: int = 0
+        # direction -> (version, view) of cached views
+        self._views: Dict[bool, Tuple[int, Tuple[LotRecord, ...]]] = {}
+
+    def __getitem__(self, item_id: int) -> Lot:
+        return self.lots[item_id]
+
+    def __setitem__(self, item_id: int, lot: Lot) -> None:
+        previous = self.lots.get(item_id)
+
+        if previous is not None:
+            self.levels.remove(previous['price'], item_id, previous['quantity'])
+            self._changed(PURGE, item_id, previous['price'], previous['quantity'])
+
+        # the index is updated first: it may reject the lot before the side is changed
+        self.levels.add(lot['price'], item_id, lot['quantity'])
+        self.lots[item_id] = lot
+        self.offer_sides[item_id] = self
+        self._changed(ADD, item_id, lot['price'], lot['quantity'])
+
+    def _changed(self, action: str, item_id: int, price: Union[int, float], quantity: int) -> None:
+        self.version += 1
+
+        if self.changes is not None:
+            self.changes.append((action, self.trade_type, item_id, price, quantity))
+
+        if self.journal is not None:
+            self.journal.write(action, self.trade_type, item_id, price, quantity)
+
+    def __delitem__(self, item_id: int) -> None:
+        self.pop(item_id)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self.lots
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.lots)
+
+    def __len__(self) -> int:
+        return len(self.lots)
+
+    def pop(self, item_id: int, *default) -> Lot:
+        """
+        Remove lot from the side and return it.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :return: removed lot
+        :rtype: Dictionary
+        """
+        try:
+            lot = self.lots.pop(item_id)
+
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+
+        del self.offer_sides[item_id]
+        self.levels.remove(lot['price'], item_id, lot['quantity'])
+        self._changed(PURGE, item_id, lot['price'], lot['quantity'])
+
+        return lot
+
+    def quantity(self, item_id: int) -> int:
+        """
+        Return quantity of the lot.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :return: amount of lots
+        :rtype: Integer
+        """
+        return self.lots[item_id]['quantity']
+
+    def set_quantity(self, item_id: int, quantity: int) -> None:
+        """
+        Replace quantity of the lot keeping its place in the queue of price level.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: new amount of lots
+        :type: Integer
+        """
+        lot = self.lots[item_id]
+
+        self.levels.change(lot['price'], quantity - lot['quantity'])
+        self.lots[item_id] = {
+            'price': lot['price'],
+            'quantity': quantity,
+        }
+        self._changed(CHANGE, item_id, lot['price'], quantity)
+
+    def iter_lots(self, reverse: bool = False) -> Iterator[Lot]:
+        """
+        Iterate over the lots of the side in price-time priority.
+
+        :param reverse: walk price levels from the highest price
+        :type: Boolean
+
+        :return: lots ordered by price, then by arrival
+        :rtype: Iterator
+        """
+        lots = self.lots
+        levels = reversed(self.levels) if reverse else iter(self.levels)
+
+        for _, queue in levels:
+            for item_id in queue:
+                yield lots[item_id]
+
+    def columns(self) -> Tuple[array, array]:
+        """
+        Return prices and quantities of the side in price-time priority.
+
+        :return: prices and quantities columns
+        :rtype: Tuple
+        """
+        lots = self.lots
+        prices = array('d')
+        quantities = array('q')
+
+        for price, queue in self.levels:
+            prices.extend(array('d', [price]) * len(queue))
+            quantities.extend(lots[item_id]['quantity'] for item_id in queue)
+
+        return prices, quantities
+
+    def _records(self, reverse: bool) -> Iterator[LotRecord]:
+        lots = self.lots
+        levels = reversed(self.levels) if reverse else iter(self.levels)
+
+        for _, queue in levels:
+            for item_id in queue:
+                yield LotRecord(item_id, lots[item_id]['price'], lots[item_id]['quantity'])
+
+    def view(self, reverse: bool = False) -> Tuple[LotRecord, ...]:
+        """
+        Return read-only view of the side in price-time priority.
+        The same tuple is returned until the side is changed.
+
+        :param reverse: walk price levels from the highest price. Default value: False
+        :type: Boolean
+
+        :return: immutable lot records ordered by price, then by arrival
+        :rtype: Tuple
+        """
+        cached = self._views.get(reverse)
+
+        if cached is None or cached[0] != self.version:
+            cached = self._views[reverse] = (self.version, tuple(self._records(reverse)))
+
+        return cached[1]
+
+
+class CompactBookSide(BookSide):
+    """Describes one side of an order book stored in parallel arrays"""
+
+    def __init__(
+        self,
+        trade_type: str = None,
+        offer_sides: Dict[int, BookSide] = None,
+        changes: Optional[deque] = None
+        ) -> None:
+        """
+        Init a new empty side.
+        Lots map offer id to a slot of prices and quantities arrays.
+        Slots of purged lots are reused by the next added lots.
+
+        :param trade_type: name of the side
+        :type: String
+
+        :param offer_sides: offer id -> side index shared by sides of one order book
+        :type: Dictionary
+
+        :param changes: change log shared by sides of one order book
+        :type: deque
+        """
+        super().__init__(trade_type, offer_sides, changes)
+
+        self.lots: Dict[int, int] = {}
+        self.prices: array = array('d')
+        self.quantities: array = array('q')
+        self.free_slots: List[int] = []
+
+    def _lot(self, slot: int) -> Lot:
+        return {'price': self.prices[slot], 'quantity': self.quantities[slot]}
+
+    def __getitem__(self, item_id: int) -> Lot:
+        return self._lot(self.lots[item_id])
+
+    def __setitem__(self, item_id: int, lot: Lot) -> None:
+        # arrays are changed one by one, so values, which do not fit into them, are rejected first
+        if not 0 <= lot['quantity'] <= MAX_QUANTITY:
+            raise ParamValueException
+
+        slot = self.lots.get(item_id)
+
+        if slot is not None:
+            self.levels.remove(self.prices[slot], item_id, self.quantities[slot])
+            self._changed(PURGE, item_id, self.prices[slot], self.quantities[slot])
+            self.prices[slot] = lot['price']
+            self.quantities[slot] = lot['quantity']
+
+        elif self.free_slots:
+            slot = self.free_slots.pop()
+            self.prices[slot] = lot['price']
+            self.quantities[slot] = lot['quantity']
+
+        else:
+            slot = len(self.prices)
+            self.prices.append(lot['price'])
+            self.quantities.append(lot['quantity'])
+
+        self.lots[item_id] = slot
+        self.offer_sides[item_id] = self
+        self.levels.add(lot['price'], item_id, lot['quantity'])
+        self._changed(ADD, item_id, lot['price'], lot['quantity'])
+
+    def pop(self, item_id: int, *default) -> Lot:
+        """
+        Remove lot from the side and return it.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :return: removed lot
+        :rtype: Dictionary
+        """
+        try:
+            slot = self.lots.pop(item_id)
+
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+
+        lot = self._lot(slot)
+        self.free_slots.append(slot)
+        del self.offer_sides[item_id]
+        self.levels.remove(lot['price'], item_id, lot['quantity'])
+        self._changed(PURGE, item_id, lot['price'], lot['quantity'])
+
+        return lot
+
+    def quantity(self, item_id: int) -> int:
+        """
+        Return quantity of the lot.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :return: amount of lots
+        :rtype: Integer
+        """
+        return self.quantities[self.lots[item_id]]
+
+    def set_quantity(self, item_id: int, quantity: int) -> None:
+        """
+        Replace quantity of the lot keeping its place in the queue of price level.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: new amount of lots
+        :type: Integer
+        """
+        if not 0 <= quantity <= MAX_QUANTITY:
+            raise ParamValueException
+
+        slot = self.lots[item_id]
+
+        self.levels.change(self.prices[slot], quantity - self.quantities[slot])
+        self.quantities[slot] = quantity
+        self._changed(CHANGE, item_id, self.prices[slot], quantity)
+
+    def iter_lots(self, reverse: bool = False) -> Iterator[Lot]:
+        """
+        Iterate over the lots of the side in price-time priority.
+
+        :param reverse: walk price levels from the highest price
+        :type: Boolean
+
+        :return: lots ordered by price, then by arrival
+        :rtype: Iterator
+        """
+        lots = self.lots
+        levels = reversed(self.levels) if reverse else iter(self.levels)
+
+        for _, queue in levels:
+            for item_id in queue:
+                yield self._lot(lots[item_id])
+
+    def columns(self) -> Tuple[array, array]:
+        """
+        Return prices and quantities of the side in price-time priority.
+
+        :return: prices and quantities columns
+        :rtype: Tuple
+        """
+        lots = self.lots
+        slot_prices = self.prices
+        slot_quantities = self.quantities
+        prices = array('d')
+        quantities = array('q')
+
+        for _, queue in self.levels:
+            for item_id in queue:
+                slot = lots[item_id]
+                prices.append(slot_prices[slot])
+                quantities.append(slot_quantities[slot])
+
+        return prices, quantities
+
+    def _records(self, reverse: bool) -> Iterator[LotRecord]:
+        lots = self.lots
+        prices = self.prices
+        quantities = self.quantities
+        levels = reversed(self.levels) if reverse else iter(self.levels)
+
+        for _, queue in levels:
+            for item_id in queue:
+                slot = lots[item_id]
+                yield LotRecord(item_id, prices[slot], quantities[slot])
+
+
+class LadderBookSide(BookSide):
+    """Describes one side of an order book indexed by a dense price ladder"""
+
+    def __init__(
+        self,
+        trade_type: str = None,
+        offer_sides: Dict[int, BookSide] = None,
+        changes: Optional[deque] = None,
+        price_range: Tuple[int, int] = None
+        ) -> None:
+        """
+        Init a new empty side.
+
+        :param trade_type: name of the side
+        :type: String
+
+        :param offer_sides: offer id -> side index shared by sides of one order book
+        :type: Dictionary
+
+        :param changes: change log shared by sides of one order book
+        :type: deque
+
+        :param price_range: the lowest and the highest integer prices of lots
+        :type: Tuple
+        """
+        super().__init__(trade_type, offer_sides, changes)
+
+        self.levels: PriceLadder = PriceLadder(*price_range)
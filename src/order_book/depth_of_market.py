@@ -6,55 +6,307 @@ OrderBook is a simplified order book model. It implements the following methods:
 - add_offer - adds a new lot to asks or bids depending on the passed parameters.
 Method receives trade type, price and quantity as input.
 
+In matching mode an incoming offer is first executed against the opposite
+trade type in price-time priority, and only its remainder is placed.
+add_offer returns MatchResult with the fills instead of the offer id.
+
 - purge_offer - removes a lot from the order book.
 Receives the id of the lot position, returns the lot object containing
 the parameters price, quantity.
 
+- amend_offer - changes quantity and/or price of the offer keeping its id.
+Reduced quantity keeps time priority of the offer.
+
+- add_trusted_offer - adds offer of a trusted caller skipping validation of the parameters.
+
+- add_offers / purge_offers - batch versions of add_offer and purge_offer.
+The whole batch is validated before the order book is changed.
+
 - get_offers_data - returns the lot object containing the parameters price, quantity.
 Receives the id of the lot position.
 
+- contains / side_of - check that the offer is in the order book and return its trade type.
+
 - get_market_snapshot - generates a snapshot of asks and bids sorted in ascending order of the lot price.
+
+- top_of_book - returns the best offers of asks and bids walking only the first price levels.
+
+- get_market_snapshot_arrays - returns sorted prices and quantities of asks and bids
+as NumPy arrays. Requires numpy to be installed.
+
+- get_market_depth - returns total quantity of the best price levels of asks and bids.
+
+- vwap_for_quantity / quantity_within / cumulative_depth - return average execution price
+of the quantity, quantity near the mid price and cumulative quantity of the best levels
+of asks or bids. Use prefix sums kept over the price levels.
+
+- get_market_view - returns a read-only versioned view of asks and bids.
+Returns the same view object while the order book is unchanged.
+
+- get_deltas - returns changes of the order book since the given version.
+Falls back to the market view if the change log does not reach that version.
+
+- take_evicted - returns offers evicted from full trade types by the overflow policy.
+
+- enable_instrumentation / stats - opt-in call counts and latency histograms
+of the hot paths together with sizes of asks and bids.
+
+- attach_journal - writes every further change of the order book into the journal.
+
+- best_ask / best_bid - return the lowest ask price and the highest bid price.
+
+If the order book is created with tick_size, prices are kept as integer
+numbers of ticks, so price levels are compared and keyed by integers. Prices
+are converted back to the multiples of the tick size by every method above.
 """
 
-from collections import namedtuple
-import copy
-from typing import Dict, List, Union
+from array import array
+from collections import deque, namedtuple
+from functools import partial
+from itertools import accumulate, islice
+from math import isclose
+from operator import ge, le
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
 
+from order_book.book_side import EXECUTE, MAX_QUANTITY, BookSide, CompactBookSide, LadderBookSide
 from order_book.exceptions import (
     InvalidDepthException, ParamTypeException, ParamValueException,
     NoElementException, TradeTypeOverflowedException
 )
+from order_book.instrumentation import INSTRUMENTED_METHODS, Instrumentation
+from order_book.price_levels import PriceLevels
 
 
 TradeTypes = namedtuple('TradeType', ['asks', 'bids'])
 TradeType = TradeTypes('asks', 'bids')
 
+MarketView = namedtuple('MarketView', ['version', 'asks', 'bids'])
+
+SnapshotArrays = namedtuple('SnapshotArrays', ['price', 'quantity'])
+
+Fill = namedtuple('Fill', ['offer_id', 'price', 'quantity'])
+MatchResult = namedtuple('MatchResult', ['offer_id', 'fills', 'remaining'])
+
+Delta = namedtuple('Delta', ['version', 'action', 'trade_type', 'offer_id', 'price', 'quantity'])
+Deltas = namedtuple('Deltas', ['version', 'changes', 'market_view'])
+
+Eviction = namedtuple('Eviction', ['offer_id', 'trade_type', 'price', 'quantity'])
+
+OverflowPolicies = namedtuple('OverflowPolicy', ['raise_', 'evict_worst', 'reject_if_worse'])
+OverflowPolicy = OverflowPolicies('raise', 'evict_worst', 'reject_if_worse')
+
+# built once: a set literal in a condition is built again on every call
+PRICE_TYPES = frozenset((int, float))
+
+STORAGES = {
+    'dict': BookSide,
+    'compact': CompactBookSide,
+    'ladder': LadderBookSide,
+}
+
 
 class OrderBook:
     """Describes an order book data type"""
 
-    def __init__(self, depth: int = 20) -> None:
+    def __init__(
+        self,
+        depth: int = 20,
+        storage: str = 'dict',
+        matching: bool = False,
+        change_log: int = 1000,
+        tick_size: Union[int, float] = None,
+        price_range: Tuple[Union[int, float], Union[int, float]] = None,
+        overflow: str = OverflowPolicy.raise_,
+        eviction_log: int = 1000
+        ) -> None:
         """
         Init a new order book.
         If depth is zero or negative - throws InvalidDepthException
+        If storage or overflow policy is unknown or ladder storage has no price range -
+        throws ParamValueException
 
         :param depth: size of order book. Default value: 20
         :type: Integer
+
+        :param storage: storage engine of lots. Available storages: dict, compact, ladder.
+        Compact storage keeps lots in arrays and returns prices as floats.
+        Ladder storage indexes price levels in arrays preallocated for the price range.
+        Default value: dict
+        :type: String
+
+        :param matching: execute crossing offers on add_offer. Default value: False
+        :type: Boolean
+
+        :param change_log: number of the latest changes kept for get_deltas.
+        Zero disables the change log. Default value: 1000
+        :type: Integer
+
+        :param tick_size: minimal price step. Prices are kept as integer numbers of ticks
+        and converted back to prices only on output. Prices, which are not multiples
+        of the tick size, are rejected. Default value: None - prices are kept as is
+        :type: [Integer, Float]
+
+        :param price_range: the lowest and the highest prices of offers. Used only by ladder storage.
+        Prices must be integers, unless tick_size is set. Offers out of the range are rejected.
+        Default value: None
+        :type: Tuple
+
+        :param overflow: what to do with an offer, which does not fit into the full trade type:
+        raise - throw TradeTypeOverflowedException;
+        evict_worst - place the offer and evict the worst priced offer of the trade type,
+        which may be the new offer itself;
+        reject_if_worse - throw TradeTypeOverflowedException if the offer is not better
+        than the worst priced offer, otherwise evict it.
+        Evicted offers are reported by take_evicted. Default value: raise
+        :type: String
+
+        :param eviction_log: number of the latest evicted offers kept for take_evicted.
+        Older evictions are dropped. Zero disables the log. Default value: 1000
+        :type: Integer
         """
         if depth <= 0:
             raise InvalidDepthException
 
+        if type(change_log) != int or type(eviction_log) != int:
+            raise ParamTypeException
+
+        if change_log < 0 or eviction_log < 0:
+            raise ParamValueException
+
+        if tick_size is not None:
+            if type(tick_size) not in PRICE_TYPES:
+                raise ParamTypeException
+
+            if tick_size <= 0:
+                raise ParamValueException
+
+        try:
+            side_class = STORAGES[storage]
+
+        except KeyError:
+            raise ParamValueException
+
+        if (storage == 'ladder') != (price_range is not None):
+            raise ParamValueException
+
+        if overflow not in OverflowPolicy:
+            raise ParamValueException
+
         self.depth: int = depth
         self.offer_id : int = 0
+        self.matching: bool = matching
+        self.overflow: str = overflow
+        self.evicted: deque = deque(maxlen=eviction_log)
+        self.tick_size: Optional[Union[int, float]] = tick_size
+        # prices of decimal ticks (0.01) are restored by division to avoid drift of multiplication
+        self._ticks_per_unit: Optional[int] = None
+
+        if type(tick_size) is float and isclose(1 / tick_size, round(1 / tick_size)):
+            self._ticks_per_unit = round(1 / tick_size)
+
+        # price range in the units of the price levels: ticks or integer prices
+        self._price_range: Optional[Tuple[int, int]] = None
+        side_options = {}
+
+        if price_range is not None:
+            try:
+                low_price, high_price = price_range
+
+            except (TypeError, ValueError):
+                raise ParamTypeException
+
+            if type(low_price) not in PRICE_TYPES or type(high_price) not in PRICE_TYPES:
+                raise ParamTypeException
+
+            if low_price <= 0:
+                raise ParamValueException
 
-        self.asks: dict = {}
-        self.bids: dict = {}
+            if tick_size is not None:
+                low_price, high_price = self._to_ticks(low_price), self._to_ticks(high_price)
+
+            elif type(low_price) is not int or type(high_price) is not int:
+                raise ParamValueException
+
+            if low_price > high_price:
+                raise ParamValueException
+
+            self._price_range = side_options['price_range'] = (low_price, high_price)
+
+        self.offer_sides: Dict[int, BookSide] = {}
+        self.changes: Optional[deque] = deque(maxlen=change_log) if change_log else None
+
+        self.asks: BookSide = side_class(TradeType.asks, self.offer_sides, self.changes, **side_options)
+        self.bids: BookSide = side_class(TradeType.bids, self.offer_sides, self.changes, **side_options)
 
         self.relations = {
             TradeType.asks: self.asks,
             TradeType.bids: self.bids
         }
 
+        self._market_view: Optional[MarketView] = None
+        self.journal = None
+        self.instrumentation: Optional[Instrumentation] = None
+
+    @property
+    def version(self) -> int:
+        """
+        Monotonically increasing version of the order book.
+        Grows by one on every added or purged offer and on every change of its quantity.
+        """
+        return self.asks.version + self.bids.version
+
+    def _to_ticks(self, price: Union[int, float]) -> int:
+        """
+        Convert validated price into number of ticks.
+        If the price is not a multiple of the tick size - throws ParamValueException
+        """
+        ticks = round(price / self.tick_size)
+
+        if ticks <= 0 or not isclose(ticks * self.tick_size, price):
+            raise ParamValueException
+
+        return ticks
+
+    def _check_range(self, price: Union[int, float]) -> None:
+        """
+        Check that price in the units of price levels is within the price range.
+        Otherwise throws ParamValueException
+        """
+        low_price, high_price = self._price_range
+
+        if type(price) is not int or not low_price <= price <= high_price:
+            raise ParamValueException
+
+    def _to_price(self, ticks: Union[int, float]) -> Union[int, float]:
+        """
+        Convert number of ticks into price.
+        """
+        if self._ticks_per_unit is not None:
+            return ticks / self._ticks_per_unit
+
+        return ticks * self.tick_size
+
+    def _export_lot(self, lot: Dict[str, Union[int, float]]) -> Dict[str, Union[int, float]]:
+        if self.tick_size is None:
+            return lot
+
+        return {'price': self._to_price(lot['price']), 'quantity': lot['quantity']}
+
+    def _export_result(self, result: MatchResult) -> MatchResult:
+        if self.tick_size is None:
+            return result
+
+        to_price = self._to_price
+        fills = [Fill(item_id, to_price(price), quantity) for item_id, price, quantity in result.fills]
+
+        return MatchResult(result.offer_id, fills, result.remaining)
+
     def add_offer(
         self,
         trade_type: str = None,
@@ -63,6 +315,9 @@ class OrderBook:
         ) -> int:
         """
         Add offer in the order book.
+        With evict_worst overflow policy an offer, which is the worst priced offer
+        of the full trade type, evicts itself: its id is returned and reported
+        by take_evicted, but the offer is not in the order book.
 
         :param trade_type: a type of trade, where the offer will be placed.
         Available trade types: asks, bids
@@ -71,13 +326,108 @@ class OrderBook:
         :param price: offer price
         :type: [Integer, Float]
 
-        :param quantity: amount of lots
+        :param quantity: amount of lots, up to 2 ** 63 - 1
         :type: Integer
 
-        :return: offer id
-        :rtype: Integer
+        :return: offer id. In matching mode - offer id, fills and not executed quantity
+        :rtype: [Integer, MatchResult]
+        """
+        self._validate_offer(trade_type, price, quantity)
+
+        if self.tick_size is not None:
+            price = self._to_ticks(price)
+
+        if self._price_range is not None:
+            self._check_range(price)
+
+        if self.matching:
+            return self._export_result(self._match_offer(trade_type, price, quantity))
+
+        return self._place_offer(trade_type, price, quantity)
+
+    def _overflows(self, side: BookSide, price: Union[int, float]) -> bool:
+        """
+        Check that the offer can not be placed into the full trade type under the overflow policy.
         """
-        if type(price) not in {int, float}:
+        if self.overflow == OverflowPolicy.evict_worst:
+            return False
+
+        if self.overflow == OverflowPolicy.raise_:
+            return True
+
+        if side.trade_type == TradeType.asks:
+            return price >= side.levels.highest()
+
+        return price <= side.levels.lowest()
+
+    def _evict_worst(self, side: BookSide) -> None:
+        """
+        Purge the worst priced offer of the trade type, which arrived last at its price.
+        The worst price level is the last one of the price level index, so it is found in O(1).
+        """
+        levels = side.levels
+        price = levels.highest() if side.trade_type == TradeType.asks else levels.lowest()
+        item_id = next(reversed(levels.queue(price)))
+        lot = self._export_lot(side.pop(item_id))
+
+        self.evicted.append(Eviction(item_id, side.trade_type, lot['price'], lot['quantity']))
+
+    def take_evicted(self) -> List[Eviction]:
+        """
+        Return offers evicted by the overflow policy since the previous call.
+        Only the latest eviction_log evictions are kept between the calls.
+
+        :return: offer id, trade type, price and quantity of every evicted offer
+        :rtype: List
+        """
+        evicted = list(self.evicted)
+        self.evicted.clear()
+
+        return evicted
+
+    def add_trusted_offer(
+        self,
+        trade_type: str,
+        price: Union[int, float],
+        quantity: int
+        ) -> Union[int, MatchResult]:
+        """
+        Add offer, which is known to be valid, in the order book.
+        Types and values of the parameters are not checked, so invalid offers
+        corrupt the order book. Offers of untrusted callers must be added with add_offer.
+        Overflow policy is applied the same way as by add_offer.
+
+        :param trade_type: a type of trade: asks or bids
+        :type: String
+
+        :param price: positive offer price. With tick_size - a multiple of the tick size within the price range
+        :type: [Integer, Float]
+
+        :param quantity: positive amount of lots
+        :type: Integer
+
+        :return: offer id. In matching mode - offer id, fills and not executed quantity
+        :rtype: [Integer, MatchResult]
+        """
+        if self.tick_size is not None:
+            price = round(price / self.tick_size)
+
+        if self.matching:
+            return self._export_result(self._match_offer(trade_type, price, quantity))
+
+        return self._place_offer(trade_type, price, quantity)
+
+    def _validate_offer(
+        self,
+        trade_type: str,
+        price: Union[int, float],
+        quantity: int
+        ) -> None:
+        """
+        Check parameters of offer. Used by add_offer, add_offers and amend_offer.
+        Throws ParamTypeException or ParamValueException.
+        """
+        if type(price) not in PRICE_TYPES:
             raise ParamTypeException
 
         elif type(quantity) != int:
@@ -86,28 +436,121 @@ class OrderBook:
         if price <= 0:
             raise ParamValueException
 
-        if quantity <= 0:
+        if quantity <= 0 or quantity > MAX_QUANTITY:
             raise ParamValueException
 
         try:
             self.relations[trade_type]
 
-        except KeyError:
+        except (KeyError, TypeError):
             raise ParamValueException
 
-        if len(self.relations[trade_type]) == self.depth:
+    def _match_offer(
+        self,
+        trade_type: str,
+        price: Union[int, float],
+        quantity: int
+        ) -> MatchResult:
+        """
+        Execute validated offer against the opposite trade type and place its remainder.
+        Offers are executed at the price of the resting offer, best price first,
+        and in the order of arrival within a price.
+        If the remainder can not be placed because the trade type is full and
+        the overflow policy rejects it - throws TradeTypeOverflowedException
+        before anything is executed.
+
+        :return: offer id, fills of resting offers and placed quantity
+        :rtype: MatchResult
+        """
+        side = self.relations[trade_type]
+
+        if len(side) == self.depth and self._overflows(side, price):
+            if trade_type == TradeType.bids:
+                opposite = self.asks
+                crosses = partial(ge, price)
+            else:
+                opposite = self.bids
+                crosses = partial(le, price)
+
+            available = 0
+            levels = iter(opposite.levels) if trade_type == TradeType.bids else reversed(opposite.levels)
+
+            for level_price, _ in levels:
+                if available >= quantity or not crosses(level_price):
+                    break
+                available += opposite.levels.quantity(level_price)
+
+            if available < quantity:
                 raise TradeTypeOverflowedException
 
-        market_lot = {
-            'price': price,
-            'quantity': quantity,
-        }
+        fills, quantity = self._execute(trade_type, price, quantity)
 
         self.offer_id += 1
-        self.relations[trade_type][self.offer_id] = market_lot
 
-        return self.offer_id
+        if quantity:
+            side[self.offer_id] = {
+                'price': price,
+                'quantity': quantity,
+            }
+
+            if len(side) > self.depth:
+                self._evict_worst(side)
+
+        elif self.journal is not None:
+            # offer id is used, though the offer is not placed
+            self.journal.write(EXECUTE, trade_type, self.offer_id, price, 0)
+
+        return MatchResult(self.offer_id, fills, quantity)
+
+    def _execute(
+        self,
+        trade_type: str,
+        price: Union[int, float],
+        quantity: int
+        ) -> Tuple[List[Fill], int]:
+        """
+        Execute quantity against the opposite trade type while the prices cross.
+
+        :return: fills of resting offers and not executed quantity
+        :rtype: Tuple
+        """
+        if trade_type == TradeType.bids:
+            opposite = self.asks
+            best_price = opposite.levels.lowest
+            crosses = partial(ge, price)
+        else:
+            opposite = self.bids
+            best_price = opposite.levels.highest
+            crosses = partial(le, price)
+
+        fills = []
+        level_price = best_price()
+
+        while quantity and level_price is not None and crosses(level_price):
+            executed = []
+
+            for item_id in opposite.levels.queue(level_price):
+                resting_quantity = opposite.quantity(item_id)
+
+                if resting_quantity > quantity:
+                    opposite.set_quantity(item_id, resting_quantity - quantity)
+                    fills.append(Fill(item_id, level_price, quantity))
+                    quantity = 0
+                    break
+
+                executed.append(item_id)
+                fills.append(Fill(item_id, level_price, resting_quantity))
+                quantity -= resting_quantity
+
+                if not quantity:
+                    break
+
+            for item_id in executed:
+                opposite.pop(item_id)
 
+            level_price = best_price()
+
+        return fills, quantity
 
     def purge_offer(self, item_id: int = None) -> Dict[str, Union[int, float]]:
         """
@@ -122,15 +565,209 @@ class OrderBook:
         if type(item_id) != int:
             raise ParamTypeException
 
-        if item_id in self.asks.keys():
-            return self.asks.pop(item_id)
+        side = self.offer_sides.get(item_id)
+
+        if side is None:
+            raise NoElementException
 
-        elif item_id in self.bids.keys():
-            return self.bids.pop(item_id)
+        return self._export_lot(side.pop(item_id))
 
-        else:
+    def amend_offer(
+        self,
+        item_id: int = None,
+        quantity: int = None,
+        price: Union[int, float] = None
+        ) -> Union[Dict[str, Union[int, float]], MatchResult]:
+        """
+        Change quantity and/or price of the offer keeping its id.
+        Reduced quantity at the same price is changed in place and keeps
+        the place of the offer in the queue of its price level.
+        Increased quantity or a new price puts the offer at the end of the queue
+        of its (new) price level.
+        In matching mode the offer with a new price is first executed against
+        the opposite trade type, like a new offer.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: new amount of lots. Default value: unchanged
+        :type: Integer
+
+        :param price: new offer price. Default value: unchanged
+        :type: [Integer, Float]
+
+        :return: amended offer. In matching mode - offer id, fills and not executed quantity
+        :rtype: [Dictionary, MatchResult]
+        """
+        if type(item_id) != int:
+            raise ParamTypeException
+
+        side = self.offer_sides.get(item_id)
+
+        if side is None:
+            raise NoElementException
+
+        lot = side[item_id]
+        new_price = lot['price'] if price is None else price
+        new_quantity = lot['quantity'] if quantity is None else quantity
+
+        self._validate_offer(side.trade_type, new_price, new_quantity)
+
+        if price is not None and self.tick_size is not None:
+            new_price = self._to_ticks(new_price)
+
+        if self._price_range is not None:
+            self._check_range(new_price)
+
+        if new_price == lot['price'] and new_quantity <= lot['quantity']:
+            if new_quantity != lot['quantity']:
+                side.set_quantity(item_id, new_quantity)
+
+            lot = side[item_id]
+
+            return MatchResult(item_id, [], lot['quantity']) if self.matching else self._export_lot(lot)
+
+        fills = []
+
+        if self.matching and new_price != lot['price']:
+            side.pop(item_id)
+            fills, new_quantity = self._execute(side.trade_type, new_price, new_quantity)
+
+            if not new_quantity:
+                return self._export_result(MatchResult(item_id, fills, 0))
+
+        side[item_id] = {
+            'price': new_price,
+            'quantity': new_quantity,
+        }
+
+        if self.matching:
+            return self._export_result(MatchResult(item_id, fills, new_quantity))
+
+        return self._export_lot(side[item_id])
+
+    def add_offers(
+        self,
+        offers: Iterable[Tuple[str, Union[int, float], int]]
+        ) -> array:
+        """
+        Add batch of offers in the order book.
+        All offers are validated before any of them is placed, so the order book
+        is left unchanged if one of the offers is invalid or the batch overflows
+        a trade type.
+        In matching mode or with overflow policy other than raise valid offers
+        are placed one by one, so an overflow is detected only when the offer,
+        which can not be placed, is reached.
+
+        :param offers: trade type, price and quantity of every offer
+        :type: Iterable
+
+        :return: offer ids in the order of offers. In matching mode - list of MatchResult
+        :rtype: [array, List]
+        """
+        offers = list(offers)
+        relations = self.relations
+        batch_sizes = dict.fromkeys(relations, 0)
+
+        for offer in offers:
+            try:
+                trade_type, price, quantity = offer
+
+            except (TypeError, ValueError):
+                raise ParamTypeException
+
+            self._validate_offer(trade_type, price, quantity)
+            batch_sizes[trade_type] += 1
+
+        if self.tick_size is not None:
+            to_ticks = self._to_ticks
+            offers = [(trade_type, to_ticks(price), quantity) for trade_type, price, quantity in offers]
+
+        if self._price_range is not None:
+            for _, price, _ in offers:
+                self._check_range(price)
+
+        if self.matching:
+            return [self._export_result(self._match_offer(*offer)) for offer in offers]
+
+        if self.overflow != OverflowPolicy.raise_:
+            return array('q', [self._place_offer(*offer) for offer in offers])
+
+        for trade_type, batch_size in batch_sizes.items():
+            if len(relations[trade_type]) + batch_size > self.depth:
+                raise TradeTypeOverflowedException
+
+        first_id = self.offer_id + 1
+
+        for item_id, (trade_type, price, quantity) in enumerate(offers, first_id):
+            relations[trade_type][item_id] = {
+                'price': price,
+                'quantity': quantity,
+            }
+
+        self.offer_id += len(offers)
+
+        return array('q', range(first_id, self.offer_id + 1))
+
+    def _place_offer(self, trade_type: str, price: Union[int, float], quantity: int) -> int:
+        """
+        Place validated offer applying the overflow policy.
+
+        :return: offer id
+        :rtype: Integer
+        """
+        side = self.relations[trade_type]
+        full = len(side) == self.depth
+
+        if full and self._overflows(side, price):
+            raise TradeTypeOverflowedException
+
+        item_id = self._next_offer_id()
+        side[item_id] = {
+            'price': price,
+            'quantity': quantity,
+        }
+
+        if full:
+            self._evict_worst(side)
+
+        return item_id
+
+    def _next_offer_id(self) -> int:
+        """
+        Issue id of a new offer.
+        """
+        self.offer_id += 1
+
+        return self.offer_id
+
+    def purge_offers(self, item_ids: Iterable[int]) -> List[Dict[str, Union[int, float]]]:
+        """
+        Purge batch of offers from the order book by their ids.
+        All ids are checked before any offer is purged, so the order book
+        is left unchanged if one of the ids is invalid or missing.
+
+        :param item_ids: offer ids
+        :type: Iterable
+
+        :return: Purged offers in the order of ids
+        :rtype: List
+        """
+        item_ids = list(item_ids)
+        offer_sides = self.offer_sides
+
+        for item_id in item_ids:
+            if type(item_id) != int:
+                raise ParamTypeException
+
+            if item_id not in offer_sides:
+                raise NoElementException
+
+        if len(set(item_ids)) != len(item_ids):
             raise NoElementException
 
+        return [self._export_lot(offer_sides[item_id].pop(item_id)) for item_id in item_ids]
+
     def get_offers_data(self, item_id: int = None) -> Dict[str, Union[int, float]]:
         """
         Return data of one offer from the order book.
@@ -144,34 +781,449 @@ class OrderBook:
         if type(item_id) != int:
             raise ParamTypeException
 
-        if item_id in self.asks.keys():
-            return self.asks.get(item_id)
+        side = self.offer_sides.get(item_id)
 
-        elif item_id in self.bids.keys():
-            return self.bids.get(item_id)
+        if side is None:
+            raise NoElementException
 
-        else:
+        return self._export_lot(side[item_id])
+
+    def contains(self, item_id: int) -> bool:
+        """
+        Check that the offer is in the order book.
+
+        :param item_id: offer id
+        :type: Integer
+
+        :return: True if the offer is in asks or bids
+        :rtype: Boolean
+        """
+        return item_id in self.offer_sides
+
+    def side_of(self, item_id: int) -> str:
+        """
+        Return trade type of the offer.
+        If the offer is not in the order book - throws NoElementException
+
+        :param item_id: offer id
+        :type: Integer
+
+        :return: trade type: asks or bids
+        :rtype: String
+        """
+        side = self.offer_sides.get(item_id)
+
+        if side is None:
             raise NoElementException
 
-    def get_market_snapshot(self) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        return side.trade_type
+
+    def get_market_snapshot(self, best_first: bool = False) -> Dict[str, List[Dict[str, Union[int, float]]]]:
         """
         Returns snapshot of market at the current time.
+        Best first snapshot walks price levels of bids from the highest price,
+        so neither side has to be reversed or sorted again.
 
-        :return: sorted asks and bids lists.
+        :param best_first: order bids from the best (the highest) price. Default value: False
+        :type: Boolean
+
+        :return: sorted asks and bids lists, in the order of arrival within a price.
+        By default both lists are in ascending order of the price,
+        best first - asks in ascending and bids in descending order.
         :rtype: Dictionary
         """
-        asks_snapshot = copy.deepcopy(self.asks)
-        bids_snapshot = copy.deepcopy(self.bids)
+        if type(best_first) != bool:
+            raise ParamTypeException
 
-        asks_lots = [lot for lot in asks_snapshot.values()]
-        bids_lots = [lot for lot in bids_snapshot.values()]
+        return self._copy_lots(self._ordered_lots(best_first))
 
-        sorted_asks_lots = sorted(asks_lots, key=lambda x: x['price'])
-        sorted_bids_lots = sorted(bids_lots, key=lambda x: x['price'])
+    def _ordered_lots(self, best_first: bool = False) -> Dict[str, Iterable[Dict[str, Union[int, float]]]]:
+        """
+        Return lots of asks and bids in price-time priority.
+        """
+        return {
+            TradeType.asks: self.asks.iter_lots(),
+            TradeType.bids: self.bids.iter_lots(reverse=best_first),
+        }
 
-        market_snapshot = {
-            TradeType.asks: sorted_asks_lots,
-            TradeType.bids: sorted_bids_lots,
+    def _copy_lots(
+        self,
+        ordered_lots: Dict[str, Iterable[Dict[str, Union[int, float]]]]
+        ) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        """
+        Copy ordered lots of asks and bids into a snapshot.
+        """
+        if self.tick_size is None:
+            return {trade_type: [dict(lot) for lot in lots] for trade_type, lots in ordered_lots.items()}
+
+        export_lot = self._export_lot
+
+        return {trade_type: [export_lot(lot) for lot in lots] for trade_type, lots in ordered_lots.items()}
+
+    def top_of_book(self, count: int = 5) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        """
+        Returns the best offers of asks and bids.
+        Only the first price levels are walked, so the cost depends on the number
+        of requested offers, not on the size of the order book.
+
+        :param count: number of the best offers of every trade type. Default value: 5
+        :type: Integer
+
+        :return: asks and bids lists starting from the best price:
+        asks in ascending and bids in descending order of the price, in the order of arrival within a price.
+        :rtype: Dictionary
+        """
+        if type(count) != int:
+            raise ParamTypeException
+
+        if count <= 0:
+            raise ParamValueException
+
+        export_lot = dict if self.tick_size is None else self._export_lot
+
+        top = {
+            TradeType.asks: [export_lot(lot) for lot in islice(self.asks.iter_lots(), count)],
+            TradeType.bids: [export_lot(lot) for lot in islice(self.bids.iter_lots(reverse=True), count)],
         }
 
+        return top
+
+    def get_market_snapshot_arrays(self) -> Dict[str, SnapshotArrays]:
+        """
+        Returns snapshot of market at the current time as NumPy arrays.
+        Arrays are built from the price level index without creating dictionaries of lots.
+        If numpy is not installed - throws ImportError
+
+        :return: price (float64) and quantity (int64) arrays of asks and bids
+        sorted in ascending order of the lot price.
+        :rtype: Dictionary
+        """
+        if numpy is None:
+            raise ImportError('numpy is required for get_market_snapshot_arrays')
+
+        market_snapshot = {}
+
+        for trade_type, side in self.relations.items():
+            prices, quantities = side.columns()
+            prices = numpy.frombuffer(prices, dtype=numpy.float64)
+
+            if self.tick_size is not None:
+                prices = self._to_price(prices)
+
+            market_snapshot[trade_type] = SnapshotArrays(prices, numpy.frombuffer(quantities, dtype=numpy.int64))
+
         return market_snapshot
+
+    def get_market_depth(self, levels: int = 10) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        """
+        Returns aggregated snapshot of market at the current time.
+        Total quantities of price levels are kept up to date on every change,
+        so the cost depends only on the number of requested levels.
+
+        :param levels: number of the best price levels of every trade type. Default value: 10
+        :type: Integer
+
+        :return: price and total quantity of levels starting from the best price:
+        asks in ascending and bids in descending order of the price.
+        :rtype: Dictionary
+        """
+        if type(levels) != int:
+            raise ParamTypeException
+
+        if levels <= 0:
+            raise ParamValueException
+
+        to_price = self._to_price if self.tick_size is not None else None
+
+        market_depth = {
+            TradeType.asks: [
+                {'price': to_price(price) if to_price else price, 'quantity': quantity}
+                for price, quantity in self.asks.levels.top(levels)
+            ],
+            TradeType.bids: [
+                {'price': to_price(price) if to_price else price, 'quantity': quantity}
+                for price, quantity in self.bids.levels.top(levels, reverse=True)
+            ],
+        }
+
+        return market_depth
+
+    def _levels_of(self, trade_type: str) -> PriceLevels:
+        try:
+            return self.relations[trade_type].levels
+
+        except (KeyError, TypeError):
+            raise ParamValueException
+
+    def vwap_for_quantity(self, trade_type: str = None, quantity: int = None) -> Optional[float]:
+        """
+        Return average price of executing the quantity against the trade type,
+        starting from its best price.
+        Uses prefix sums of blocks of the price levels, so the cost is O(log n) of the number of levels
+        plus walking one block of levels, also when levels were added or dropped since the last query.
+
+        :param trade_type: trade type, which offers are executed: asks or bids
+        :type: String
+
+        :param quantity: amount of lots to execute
+        :type: Integer
+
+        :return: volume weighted average price or None if the trade type has less quantity
+        :rtype: [Float, None]
+        """
+        levels = self._levels_of(trade_type)
+
+        if type(quantity) != int:
+            raise ParamTypeException
+
+        if quantity <= 0:
+            raise ParamValueException
+
+        total_quantity, total_notional = levels.total()
+
+        if quantity > total_quantity:
+            return None
+
+        if trade_type == TradeType.asks:
+            # the lowest levels are executed in full, the next one partially
+            count = levels.search(quantity - 1)
+            executed, notional = levels.prefix(count)
+        else:
+            # the highest levels are executed in full, the previous one partially
+            count = levels.search(total_quantity - quantity)
+            below_quantity, below_notional = levels.prefix(count + 1)
+            executed = total_quantity - below_quantity
+            notional = total_notional - below_notional
+
+        notional += (quantity - executed) * levels.price_at(count)
+
+        if self.tick_size is not None:
+            return self._to_price(notional / quantity)
+
+        return notional / quantity
+
+    def quantity_within(self, trade_type: str = None, price_band: Union[int, float] = None) -> int:
+        """
+        Return total quantity of the trade type within the price band from the mid price.
+        If the opposite trade type is empty, the band is measured from the best price of the trade type.
+        Uses prefix sums of blocks of the price levels, so the cost is O(log n) of the number of levels
+        plus walking one block of levels, also when levels were added or dropped since the last query.
+
+        :param trade_type: trade type: asks or bids
+        :type: String
+
+        :param price_band: distance from the mid price
+        :type: [Integer, Float]
+
+        :return: amount of lots
+        :rtype: Integer
+        """
+        levels = self._levels_of(trade_type)
+
+        if type(price_band) not in PRICE_TYPES:
+            raise ParamTypeException
+
+        if price_band < 0:
+            raise ParamValueException
+
+        if self.tick_size is not None:
+            price_band = price_band / self.tick_size
+
+        if not levels:
+            return 0
+
+        best_ask = self.asks.levels.lowest()
+        best_bid = self.bids.levels.highest()
+
+        if best_ask is not None and best_bid is not None:
+            mid_price = (best_ask + best_bid) / 2
+        else:
+            mid_price = best_ask if trade_type == TradeType.asks else best_bid
+
+        if trade_type == TradeType.asks:
+            return levels.prefix(levels.rank(mid_price + price_band, inclusive=True))[0]
+
+        count = levels.rank(mid_price - price_band)
+
+        return levels.total()[0] - levels.prefix(count)[0]
+
+    def cumulative_depth(self, trade_type: str = None, levels: int = 10) -> List[Dict[str, Union[int, float]]]:
+        """
+        Return cumulative quantity of the best price levels of the trade type.
+
+        :param trade_type: trade type: asks or bids
+        :type: String
+
+        :param levels: number of the best price levels. Default value: 10
+        :type: Integer
+
+        :return: price of every level and total quantity of the levels up to it,
+        starting from the best price
+        :rtype: List
+        """
+        price_levels = self._levels_of(trade_type)
+
+        if type(levels) != int:
+            raise ParamTypeException
+
+        if levels <= 0:
+            raise ParamValueException
+
+        top = price_levels.top(levels, reverse=trade_type == TradeType.bids)
+        cumulative_quantities = accumulate(quantity for _, quantity in top)
+
+        to_price = self._to_price if self.tick_size is not None else None
+
+        return [
+            {'price': to_price(price) if to_price else price, 'quantity': quantity}
+            for (price, _), quantity in zip(top, cumulative_quantities)
+        ]
+
+    def get_market_view(self) -> MarketView:
+        """
+        Returns read-only view of market at the current time.
+        Lots are not copied: asks and bids are tuples of immutable records
+        in ascending order of the lot price. While the version of the order book
+        is unchanged the cached view is returned.
+
+        :return: version, asks and bids of the order book
+        :rtype: MarketView
+        """
+        version = self.version
+        market_view = self._market_view
+
+        if market_view is None or market_view.version != version:
+            asks_view = self.asks.view()
+            bids_view = self.bids.view()
+
+            if self.tick_size is not None:
+                to_price = self._to_price
+                asks_view = tuple(lot._replace(price=to_price(lot.price)) for lot in asks_view)
+                bids_view = tuple(lot._replace(price=to_price(lot.price)) for lot in bids_view)
+
+            market_view = MarketView(version, asks_view, bids_view)
+            self._market_view = market_view
+
+        return market_view
+
+    def get_deltas(self, since_version: int) -> Deltas:
+        """
+        Returns changes of the order book made after the given version.
+        Every change is an added or purged lot or a new quantity of a resting lot.
+        If the change log is disabled or has been truncated past the given version,
+        returns the market view instead of changes.
+
+        :param since_version: version of the order book known to the caller
+        :type: Integer
+
+        :return: current version and either changes or market view
+        :rtype: Deltas
+        """
+        if type(since_version) != int:
+            raise ParamTypeException
+
+        version = self.version
+
+        if since_version < 0 or since_version > version:
+            raise ParamValueException
+
+        changes = self.changes
+
+        if changes is not None and since_version >= version - len(changes):
+            start = len(changes) - (version - since_version)
+            deltas = [
+                Delta(change_version, *change)
+                for change_version, change in zip(
+                    range(since_version + 1, version + 1), islice(changes, start, None)
+                )
+            ]
+
+            if self.tick_size is not None:
+                to_price = self._to_price
+                deltas = [delta._replace(price=to_price(delta.price)) for delta in deltas]
+
+            return Deltas(version, deltas, None)
+
+        return Deltas(version, None, self.get_market_view())
+
+    def enable_instrumentation(self, methods: Iterable[str] = INSTRUMENTED_METHODS) -> Instrumentation:
+        """
+        Start counting calls and recording latencies of the methods of this order book.
+        Methods are wrapped on the instance, so other order books are not affected.
+
+        :param methods: names of methods to be timed. Default value: add_offer(s), add_trusted_offer, amend_offer,
+        purge_offer(s), get_offers_data, get_market_snapshot, top_of_book
+        :type: Iterable
+
+        :return: attached instrumentation
+        :rtype: Instrumentation
+        """
+        self.disable_instrumentation()
+
+        self.instrumentation = Instrumentation(self, methods)
+        self.instrumentation.attach()
+
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """
+        Restore methods of this order book. Recorded statistics are dropped.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.detach()
+            self.instrumentation = None
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Return sizes of asks and bids and, if instrumentation is enabled,
+        call counts and latency histograms of the methods and of the snapshot phases.
+
+        :return: sides, methods and snapshot statistics
+        :rtype: Dictionary
+        """
+        statistics = {
+            'sides': {
+                trade_type: {'offers': len(side), 'levels': len(side.levels)}
+                for trade_type, side in self.relations.items()
+            },
+        }
+
+        if self.instrumentation is not None:
+            statistics.update(self.instrumentation.stats())
+
+        return statistics
+
+    def attach_journal(self, journal) -> None:
+        """
+        Write every further change of the order book into the journal.
+        Pass None to detach the journal.
+
+        :param journal: journal with write(action, trade_type, offer_id, price, quantity) method
+        :type: order_book.journal.Journal
+        """
+        self.journal = journal
+
+        for side in self.relations.values():
+            side.journal = journal
+
+    def best_ask(self) -> Optional[Union[int, float]]:
+        """
+        Return the lowest ask price.
+
+        :return: best ask price or None if there are no asks
+        :rtype: [Integer, Float, None]
+        """
+        price = self.asks.levels.lowest()
+
+        return self._to_price(price) if self.tick_size is not None and price is not None else price
+
+    def best_bid(self) -> Optional[Union[int, float]]:
+        """
+        Return the highest bid price.
+
+        :return: best bid price or None if there are no bids
+        :rtype: [Integer, Float, None]
+        """
+        price = self.bids.levels.highest()
+
+        return self._to_price(price) if self.tick_size is not None and price is not None else price
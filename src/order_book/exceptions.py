@@ -19,3 +19,7 @@ class NoElementException(Exception):
 
 class TradeTypeOverflowedException(Exception):
     pass
+
+
+class InvalidStateException(Exception):
+    pass
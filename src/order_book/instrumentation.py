@@ -0,0 +1,217 @@
+"""
+Module with opt-in instrumentation of Order Book hot paths
+
+Instrumentation replaces methods of one order book instance with wrappers,
+which count calls and record their latency into histograms. Methods of the
+class are not changed, so order books without instrumentation pay nothing.
+
+LatencyHistogram is an HDR-style histogram of fixed size: values below
+2 ** SUB_BUCKET_BITS nanoseconds have their own buckets, larger values are
+split into 2 ** SUB_BUCKET_BITS buckets per power of two, so every value is
+recorded with the precision of about 6% in constant memory.
+
+Market snapshot is timed in two phases: ordering of lots in price-time
+priority and copying of lots into the snapshot.
+"""
+
+from array import array
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterable
+
+from order_book.exceptions import ParamTypeException
+
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# values above 2 ** (MAX_VALUE_BITS) ns (about 18 minutes) are recorded into the last bucket
+MAX_VALUE_BITS = 40
+
+BUCKETS = SUB_BUCKETS * (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1)
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+INSTRUMENTED_METHODS = (
+    'add_offer', 'add_trusted_offer', 'add_offers', 'amend_offer', 'purge_offer', 'purge_offers',
+    'get_offers_data', 'get_market_snapshot', 'top_of_book',
+)
+
+
+def _bucket(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+
+    return min(SUB_BUCKETS * (shift + 1) + (value >> shift) - SUB_BUCKETS, BUCKETS - 1)
+
+
+def _highest_value(bucket: int) -> int:
+    if bucket < SUB_BUCKETS:
+        return bucket
+
+    shift = bucket // SUB_BUCKETS - 1
+
+    return ((SUB_BUCKETS + bucket % SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Describes a fixed size histogram of latencies in nanoseconds"""
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self) -> None:
+        """
+        Init a new empty histogram.
+        """
+        self.counts: array = array('q', bytes(8 * BUCKETS))
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def record(self, value: int) -> None:
+        """
+        Record one latency.
+
+        :param value: latency in nanoseconds
+        :type: Integer
+        """
+        self.counts[_bucket(value)] += 1
+        self.count += 1
+        self.total += value
+
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Return the highest latency of the bucket, which contains the percentile.
+
+        :param percentile: percentile from 0 to 100
+        :type: [Integer, Float]
+
+        :return: latency in nanoseconds
+        :rtype: Integer
+        """
+        if not self.count:
+            return 0
+
+        rank = max(self.count * percentile / 100, 1)
+        seen = 0
+
+        for bucket, count in enumerate(self.counts):
+            seen += count
+
+            if seen >= rank:
+                # the last bucket also holds values above its range
+                return self.max if bucket == BUCKETS - 1 else min(_highest_value(bucket), self.max)
+
+        return self.max
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Return number of calls, mean, max and percentiles of latencies.
+
+        :return: statistics of the histogram
+        :rtype: Dictionary
+        """
+        statistics = {
+            'count': self.count,
+            'mean_ns': round(self.total / self.count) if self.count else 0,
+            'max_ns': self.max,
+        }
+
+        for percentile in PERCENTILES:
+            statistics[f'p{percentile:g}_ns'] = self.percentile(percentile)
+
+        return statistics
+
+
+class Instrumentation:
+    """Describes instrumentation of one order book"""
+
+    def __init__(self, book: Any, methods: Iterable[str] = INSTRUMENTED_METHODS) -> None:
+        """
+        Init instrumentation of the order book. Methods are not wrapped until attach is called.
+
+        :param book: order book to be instrumented
+        :type: OrderBook
+
+        :param methods: names of methods to be timed
+        :type: Iterable
+        """
+        self.book = book
+        self.methods = tuple(methods)
+        self.histograms: Dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in self.methods}
+        self.snapshot_histograms: Dict[str, LatencyHistogram] = {
+            'order': LatencyHistogram(),
+            'copy': LatencyHistogram(),
+        }
+
+    def _timed(self, name: str, method: Callable) -> Callable:
+        record = self.histograms[name].record
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = perf_counter_ns()
+
+            try:
+                return method(*args, **kwargs)
+
+            finally:
+                record(perf_counter_ns() - started)
+
+        return timed
+
+    def _timed_snapshot(self) -> Callable:
+        book = self.book
+        record = self.histograms['get_market_snapshot'].record
+        record_order = self.snapshot_histograms['order'].record
+        record_copy = self.snapshot_histograms['copy'].record
+
+        def timed_snapshot(best_first: bool = False) -> Dict[str, Any]:
+            if type(best_first) != bool:
+                raise ParamTypeException
+
+            started = perf_counter_ns()
+            ordered_lots = {trade_type: list(lots) for trade_type, lots in book._ordered_lots(best_first).items()}
+            ordered = perf_counter_ns()
+            market_snapshot = book._copy_lots(ordered_lots)
+            finished = perf_counter_ns()
+
+            record_order(ordered - started)
+            record_copy(finished - ordered)
+            record(finished - started)
+
+            return market_snapshot
+
+        return timed_snapshot
+
+    def attach(self) -> None:
+        """
+        Replace methods of the order book instance with timed wrappers.
+        """
+        for name in self.methods:
+            if name == 'get_market_snapshot':
+                wrapper = self._timed_snapshot()
+            else:
+                wrapper = self._timed(name, getattr(type(self.book), name).__get__(self.book))
+
+            setattr(self.book, name, wrapper)
+
+    def detach(self) -> None:
+        """
+        Restore methods of the order book instance.
+        """
+        for name in self.methods:
+            self.book.__dict__.pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return statistics of timed methods and snapshot phases.
+
+        :return: histogram statistics of every method and of snapshot ordering and copying
+        :rtype: Dictionary
+        """
+        return {
+            'methods': {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            'snapshot': {name: histogram.to_dict() for name, histogram in self.snapshot_histograms.items()},
+        }
@@ -0,0 +1,280 @@
+"""
+Module with write-ahead journal for Order Book project
+
+Journal attached to an order book (OrderBook.attach_journal) receives every
+change of the order book and appends it to the journal file as a fixed-width
+record: sequence number, action, offer id, trade type, price type, price,
+quantity. Prices of order books with tick size are written as numbers
+of ticks. Records are buffered and synced to disk in groups of sync_every
+records, or when sync is called.
+
+Offers fully executed in matching mode are never placed, so the order book
+writes them into the journal as EXECUTE records to keep their offer ids.
+
+checkpoint saves state of the order book (order_book.persistence) together
+with the sequence number of the last record and starts an empty journal.
+recover loads the latest checkpoint and replays only the records written
+after it. Records already included into the checkpoint are skipped, so a crash
+between saving the checkpoint and resetting the journal is harmless.
+"""
+
+import os
+import struct
+from typing import Any, Iterator, Tuple, Union
+
+from order_book.book_side import ADD, CHANGE, EXECUTE, PURGE
+from order_book.depth_of_market import OrderBook
+from order_book.exceptions import InvalidStateException, ParamTypeException, ParamValueException
+from order_book.persistence import (
+    PRICE_FLOAT, PRICE_INT, TRADE_TYPE_CODES, TRADE_TYPES, load, read_header, save
+)
+
+
+MAGIC = b'OBKJ'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sHq')
+RECORD = struct.Struct('<qBqBBdq')
+
+ACTIONS = (ADD, PURGE, CHANGE, EXECUTE)
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+JournalRecord = Tuple[int, str, int, str, Union[int, float], int]
+
+
+def _write_header(path: str, base_sequence: int) -> None:
+    temporary_path = f'{path}.tmp'
+
+    with open(temporary_path, 'wb') as journal:
+        journal.write(HEADER.pack(MAGIC, FORMAT_VERSION, base_sequence))
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def _read_base_sequence(journal) -> int:
+    header = journal.read(HEADER.size)
+
+    if len(header) < HEADER.size:
+        raise InvalidStateException
+
+    magic, format_version, base_sequence = HEADER.unpack(header)
+
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise InvalidStateException
+
+    return base_sequence
+
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """
+    Read records of the journal file.
+    Incomplete record at the end of the file (interrupted write) is ignored.
+
+    :param path: path to the journal file
+    :type: String
+
+    :return: sequence number, action, trade type, offer id, price, quantity of every record
+    :rtype: Iterator
+    """
+    with open(path, 'rb') as journal:
+        _read_base_sequence(journal)
+
+        while True:
+            record = journal.read(RECORD.size)
+            if len(record) < RECORD.size:
+                break
+
+            sequence, action, item_id, trade_type, price_type, price, quantity = RECORD.unpack(record)
+
+            if action >= len(ACTIONS) or trade_type >= len(TRADE_TYPES):
+                raise InvalidStateException
+
+            yield (
+                sequence, ACTIONS[action], TRADE_TYPES[trade_type], item_id,
+                int(price) if price_type == PRICE_INT else price, quantity,
+            )
+
+
+class Journal:
+    """Describes an append-only journal of order book changes"""
+
+    def __init__(self, path: str, sync_every: int = 100) -> None:
+        """
+        Open the journal file or create a new one.
+        Sequence numbers continue from the last complete record of the file.
+
+        :param path: path to the journal file
+        :type: String
+
+        :param sync_every: number of records written to disk at once. Default value: 100
+        :type: Integer
+        """
+        if type(sync_every) != int:
+            raise ParamTypeException
+
+        if sync_every <= 0:
+            raise ParamValueException
+
+        self.path: str = path
+        self.sync_every: int = sync_every
+
+        if not os.path.exists(path) or not os.path.getsize(path):
+            _write_header(path, 0)
+
+        with open(path, 'r+b') as journal:
+            self.sequence: int = _read_base_sequence(journal)
+
+            records = (os.fstat(journal.fileno()).st_size - HEADER.size) // RECORD.size
+
+            if records:
+                journal.seek(HEADER.size + (records - 1) * RECORD.size)
+                self.sequence = RECORD.unpack(journal.read(RECORD.size))[0]
+
+            # drop incomplete record left by interrupted write
+            journal.truncate(HEADER.size + records * RECORD.size)
+
+        self._file = open(path, 'ab')
+        self._buffer = bytearray()
+        self._pending = 0
+
+    def write(self, action: str, trade_type: str, item_id: int, price: Union[int, float], quantity: int) -> None:
+        """
+        Append change of the order book to the journal.
+        The record is synced to disk with the group of sync_every records.
+        """
+        self.sequence += 1
+        self._buffer += RECORD.pack(
+            self.sequence, ACTION_CODES[action], item_id, TRADE_TYPE_CODES[trade_type],
+            PRICE_INT if type(price) is int else PRICE_FLOAT, price, quantity,
+        )
+        self._pending += 1
+
+        if self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Write buffered records and sync the journal file to disk.
+        """
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def checkpoint(self, book: OrderBook, state_path: str) -> int:
+        """
+        Save state of the order book and start an empty journal.
+
+        :param book: order book, which writes into this journal
+        :type: OrderBook
+
+        :param state_path: path to the state file
+        :type: String
+
+        :return: sequence number of the last record included into the state
+        :rtype: Integer
+        """
+        self.sync()
+        save(book, state_path, self.sequence)
+
+        self._file.close()
+        _write_header(self.path, self.sequence)
+        self._file = open(self.path, 'ab')
+
+        return self.sequence
+
+    def close(self) -> None:
+        """
+        Sync buffered records and close the journal file.
+        """
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def recover(
+    state_path: str,
+    journal_path: str,
+    depth: int = 20,
+    storage: str = 'dict',
+    matching: bool = False,
+    tick_size: Union[int, float] = None,
+    **book_options: Any
+    ) -> OrderBook:
+    """
+    Restore order book from the latest checkpoint and the journal written after it.
+
+    :param state_path: path to the state file. It may not exist yet
+    :type: String
+
+    :param journal_path: path to the journal file. It may not exist yet
+    :type: String
+
+    :param depth: size of order book, if there is no checkpoint. Default value: 20
+    :type: Integer
+
+    :param storage: storage engine of lots. Default value: dict
+    :type: String
+
+    :param matching: matching mode, if there is no checkpoint. Default value: False
+    :type: Boolean
+
+    :param tick_size: tick size, if there is no checkpoint. Default value: None
+    :type: [Integer, Float]
+
+    :param book_options: other OrderBook parameters, e.g. price_range, overflow or change_log
+    :type: Dictionary
+
+    :return: restored order book without attached journal
+    :rtype: OrderBook
+    """
+    if os.path.exists(state_path):
+        book = load(state_path, storage=storage, **book_options)
+        sequence = read_header(state_path).sequence
+
+    else:
+        book = OrderBook(depth, storage=storage, matching=matching, tick_size=tick_size, **book_options)
+        sequence = 0
+
+    if not os.path.exists(journal_path):
+        return book
+
+    relations = book.relations
+    offer_sides = book.offer_sides
+
+    for record_sequence, action, trade_type, item_id, price, quantity in read_journal(journal_path):
+        if record_sequence <= sequence:
+            continue
+
+        try:
+            if action == ADD:
+                relations[trade_type][item_id] = {
+                    'price': price,
+                    'quantity': quantity,
+                }
+                book.offer_id = max(book.offer_id, item_id)
+
+            elif action == PURGE:
+                offer_sides[item_id].pop(item_id)
+
+            elif action == CHANGE:
+                offer_sides[item_id].set_quantity(item_id, quantity)
+
+            else:
+                book.offer_id = max(book.offer_id, item_id)
+
+        except KeyError:
+            raise InvalidStateException
+
+    return book
@@ -0,0 +1,257 @@
+"""
+Module with multi-instrument book manager for Order Book project
+
+BookManager owns order books of many instruments. Instruments are sharded
+between worker processes by a stable hash of the symbol, and every worker
+owns the order books of its instruments. Commands are grouped by worker and
+sent as one batch per worker, so workers execute them in parallel.
+
+Command is a tuple: (symbol, method, args), where method is a name of OrderBook
+method, e.g. ('EURUSD', 'add_offer', ('asks', 1.1, 10)).
+
+add_trusted_offer is not a command: commands come from other processes, so their
+offers are validated. Instrumentation and journal methods are not commands either,
+as they return or take objects of the worker process.
+"""
+
+import multiprocessing
+from multiprocessing.connection import Connection
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import zlib
+
+from order_book.depth_of_market import OrderBook
+from order_book.exceptions import ParamValueException
+
+
+Command = Tuple[str, str, Sequence[Any]]
+
+COMMANDS = frozenset({
+    'add_offer', 'add_offers', 'amend_offer', 'purge_offer', 'purge_offers', 'get_offers_data',
+    'contains', 'side_of', 'best_ask', 'best_bid', 'take_evicted',
+    'get_market_snapshot', 'get_market_snapshot_arrays', 'get_market_depth', 'get_market_view',
+    'get_deltas', 'top_of_book', 'vwap_for_quantity', 'quantity_within', 'cumulative_depth',
+})
+
+GATHER_SNAPSHOTS = '__gather_snapshots__'
+
+
+def _worker(connection: Connection, depth: int, book_options: Dict[str, Any]) -> None:
+    """
+    Execute batches of commands received from the manager until None is received.
+    Order books are created on the first command of their instrument.
+    """
+    books: Dict[str, OrderBook] = {}
+
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+
+        results = []
+
+        for symbol, method, args in batch:
+            try:
+                if method == GATHER_SNAPSHOTS:
+                    result = {
+                        book_symbol: book.get_market_snapshot()
+                        for book_symbol, book in books.items()
+                        if args is None or book_symbol in args
+                    }
+
+                else:
+                    book = books.get(symbol)
+                    if book is None:
+                        book = books[symbol] = OrderBook(depth, **book_options)
+
+                    result = getattr(book, method)(*args)
+
+                results.append((True, result))
+
+            except Exception as error:
+                results.append((False, error))
+
+        connection.send(results)
+
+    connection.close()
+
+
+class BookManager:
+    """Describes a manager of order books sharded across processes"""
+
+    def __init__(self, workers: Optional[int] = None, depth: int = 20, **book_options: Any) -> None:
+        """
+        Init a new manager and start its workers.
+
+        :param workers: number of worker processes. Default value: number of CPUs
+        :type: Integer
+
+        :param depth: size of every order book. Default value: 20
+        :type: Integer
+
+        :param book_options: other OrderBook parameters, e.g. storage or matching
+        :type: Dictionary
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers <= 0:
+            raise ParamValueException
+
+        # validate order book parameters before workers are started
+        OrderBook(depth, **book_options)
+
+        self._connections: List[Connection] = []
+        self._processes: List[multiprocessing.Process] = []
+
+        for _ in range(workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, args=(worker_connection, depth, book_options), daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    @property
+    def workers(self) -> int:
+        return len(self._processes)
+
+    def shard_of(self, symbol: str) -> int:
+        """
+        Return index of the worker, which owns the order book of the instrument.
+
+        :param symbol: instrument symbol
+        :type: String
+
+        :return: worker index
+        :rtype: Integer
+        """
+        return zlib.crc32(symbol.encode()) % len(self._processes)
+
+    def _send(self, batches: Dict[int, List[Command]]) -> Dict[int, List[Tuple[bool, Any]]]:
+        for shard, batch in batches.items():
+            self._connections[shard].send(batch)
+
+        return {shard: self._connections[shard].recv() for shard in batches}
+
+    def execute(self, commands: Iterable[Command], return_exceptions: bool = False) -> List[Any]:
+        """
+        Execute commands on the order books of their instruments.
+        Commands of one instrument are executed in the order they are passed.
+
+        :param commands: symbol, OrderBook method name and its arguments
+        :type: Iterable
+
+        :param return_exceptions: put exceptions into results instead of raising the first one
+        :type: Boolean
+
+        :return: results in the order of commands
+        :rtype: List
+        """
+        batches: Dict[int, List[Command]] = {}
+        positions: Dict[int, List[int]] = {}
+        count = 0
+
+        for position, (symbol, method, args) in enumerate(commands):
+            if method not in COMMANDS:
+                raise ParamValueException
+
+            shard = self.shard_of(symbol)
+            batches.setdefault(shard, []).append((symbol, method, tuple(args)))
+            positions.setdefault(shard, []).append(position)
+            count = position + 1
+
+        results: List[Any] = [None] * count
+        error = None
+
+        for shard, shard_results in self._send(batches).items():
+            for position, (succeeded, result) in zip(positions[shard], shard_results):
+                results[position] = result
+
+                if not succeeded and error is None:
+                    error = result
+
+        if error is not None and not return_exceptions:
+            raise error
+
+        return results
+
+    def add_offer(self, symbol: str, trade_type: str, price: float, quantity: int) -> Any:
+        """
+        Add offer in the order book of the instrument.
+
+        :return: result of OrderBook.add_offer
+        """
+        return self.execute([(symbol, 'add_offer', (trade_type, price, quantity))])[0]
+
+    def purge_offer(self, symbol: str, item_id: int) -> Dict[str, Any]:
+        """
+        Purge offer from the order book of the instrument.
+
+        :return: result of OrderBook.purge_offer
+        """
+        return self.execute([(symbol, 'purge_offer', (item_id,))])[0]
+
+    def get_offers_data(self, symbol: str, item_id: int) -> Dict[str, Any]:
+        """
+        Return data of one offer from the order book of the instrument.
+
+        :return: result of OrderBook.get_offers_data
+        """
+        return self.execute([(symbol, 'get_offers_data', (item_id,))])[0]
+
+    def gather_snapshots(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, List]]:
+        """
+        Return market snapshots of order books from all workers.
+
+        :param symbols: instruments to be included. Default value: all instruments
+        :type: Iterable
+
+        :return: symbol -> market snapshot
+        :rtype: Dictionary
+        """
+        if symbols is None:
+            batches = {shard: [(None, GATHER_SNAPSHOTS, None)] for shard in range(self.workers)}
+
+        else:
+            batches = {}
+            for symbol in set(symbols):
+                batches.setdefault(self.shard_of(symbol), set()).add(symbol)
+
+            batches = {shard: [(None, GATHER_SNAPSHOTS, owned)] for shard, owned in batches.items()}
+
+        snapshots = {}
+
+        for shard_results in self._send(batches).values():
+            succeeded, result = shard_results[0]
+            if not succeeded:
+                raise result
+            snapshots.update(result)
+
+        return snapshots
+
+    def close(self) -> None:
+        """
+        Stop workers. Order books of the workers are lost.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+
+        for process in self._processes:
+            process.join()
+
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self) -> 'BookManager':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,231 @@
+"""
+Module with binary persistence of Order Book state
+
+State file consists of a header and fixed-width records of resting offers:
+
+- header: magic, format version, flags, depth, last offer id, number of records,
+journal sequence number, tick size (zero if prices are not in ticks) and CRC32 of the records.
+
+- record: offer id, trade type, price type, price, quantity.
+
+Records are written in price-time priority of asks and then of bids, so
+the queues of price levels are restored by loading records in file order.
+Integer prices are stored as doubles and restored as integers. Order books with
+tick size store prices as numbers of ticks.
+
+load can read the file through a memory map: records are decoded straight
+from the mapping without reading the file into memory, and the CRC32 check is
+left to verify, which can be called later. Every record is still decoded and
+put into the order book by load, so memory mapped load is not lazy: it saves
+only the copy of the file and the checksum pass.
+
+State file is written into a temporary file, which replaces the target file
+only after it is synced, so a crash never leaves a partially written state.
+"""
+
+from collections import namedtuple
+import mmap
+import os
+import struct
+from typing import Any
+import zlib
+
+from order_book.depth_of_market import OrderBook, TradeType
+from order_book.exceptions import InvalidStateException
+
+
+MAGIC = b'OBKS'
+FORMAT_VERSION = 3
+
+HEADER = struct.Struct('<4sHHqqqqdI')
+RECORD = struct.Struct('<qBBdq')
+
+FLAG_MATCHING = 1
+FLAG_INTEGER_TICK = 2
+
+TRADE_TYPES = (TradeType.asks, TradeType.bids)
+TRADE_TYPE_CODES = {trade_type: code for code, trade_type in enumerate(TRADE_TYPES)}
+
+PRICE_INT = 0
+PRICE_FLOAT = 1
+
+StateHeader = namedtuple(
+    'StateHeader', ['flags', 'depth', 'offer_id', 'count', 'sequence', 'tick_size', 'checksum']
+)
+
+
+def save(book: OrderBook, path: str, sequence: int = 0) -> int:
+    """
+    Save state of the order book into binary file.
+
+    :param book: order book to be saved
+    :type: OrderBook
+
+    :param path: path to the state file
+    :type: String
+
+    :param sequence: sequence number of the last journal record included into the state
+    :type: Integer
+
+    :return: number of saved offers
+    :rtype: Integer
+    """
+    count = len(book.asks) + len(book.bids)
+    records = bytearray(RECORD.size * count)
+    pack_into = RECORD.pack_into
+    offset = 0
+
+    for trade_type in TRADE_TYPES:
+        code = TRADE_TYPE_CODES[trade_type]
+
+        for lot in book.relations[trade_type].view():
+            price_type = PRICE_INT if type(lot.price) is int else PRICE_FLOAT
+            pack_into(records, offset, lot.offer_id, code, price_type, lot.price, lot.quantity)
+            offset += RECORD.size
+
+    flags = FLAG_MATCHING if book.matching else 0
+
+    if type(book.tick_size) is int:
+        flags |= FLAG_INTEGER_TICK
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, flags, book.depth, book.offer_id, count, sequence,
+        book.tick_size or 0, zlib.crc32(records),
+    )
+
+    temporary_path = f'{path}.tmp'
+
+    with open(temporary_path, 'wb') as state:
+        state.write(header)
+        state.write(records)
+        state.flush()
+        os.fsync(state.fileno())
+
+    os.replace(temporary_path, path)
+
+    return count
+
+
+def _read_header(data: Any, size: int = None) -> StateHeader:
+    if len(data) < HEADER.size:
+        raise InvalidStateException
+
+    magic, format_version, *fields = HEADER.unpack_from(data)
+    header = StateHeader(*fields)
+
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise InvalidStateException
+
+    if (len(data) if size is None else size) != HEADER.size + header.count * RECORD.size:
+        raise InvalidStateException
+
+    return header
+
+
+def read_header(path: str) -> StateHeader:
+    """
+    Read header of binary file.
+    If the file is not a valid state file - throws InvalidStateException
+
+    :param path: path to the state file
+    :type: String
+
+    :return: flags, depth, last offer id, number of records, journal sequence number, tick size and CRC32
+    :rtype: StateHeader
+    """
+    with open(path, 'rb') as state:
+        return _read_header(state.read(HEADER.size), os.fstat(state.fileno()).st_size)
+
+
+def _build(data: Any, verify_checksum: bool, book_options: dict) -> OrderBook:
+    flags, depth, offer_id, count, sequence, tick_size, checksum = _read_header(data)
+
+    if tick_size:
+        book_options['tick_size'] = int(tick_size) if flags & FLAG_INTEGER_TICK else tick_size
+
+    book = OrderBook(depth, matching=bool(flags & FLAG_MATCHING), **book_options)
+    sides = [book.relations[trade_type] for trade_type in TRADE_TYPES]
+
+    with data[HEADER.size:] as records:
+        if verify_checksum and zlib.crc32(records) != checksum:
+            raise InvalidStateException
+
+        for item_id, code, price_type, price, quantity in RECORD.iter_unpack(records):
+            if code >= len(sides) or price <= 0 or quantity <= 0 or item_id > offer_id:
+                raise InvalidStateException
+
+            side = sides[code]
+            if item_id in book.offer_sides or len(side) == depth:
+                raise InvalidStateException
+
+            side[item_id] = {
+                'price': int(price) if price_type == PRICE_INT else price,
+                'quantity': quantity,
+            }
+
+    book.offer_id = offer_id
+
+    return book
+
+
+def load(path: str, use_mmap: bool = False, verify_checksum: bool = None, **book_options: Any) -> OrderBook:
+    """
+    Load order book from binary file.
+    If the file is not a valid state file - throws InvalidStateException
+
+    :param path: path to the state file
+    :type: String
+
+    :param use_mmap: decode records from memory map of the file instead of reading it into memory.
+    All records are still loaded at once. Default value: False
+    :type: Boolean
+
+    :param verify_checksum: check CRC32 of the records.
+    Default value: True for regular load, False for memory mapped load
+    :type: Boolean
+
+    :param book_options: other OrderBook parameters, e.g. storage
+    :type: Dictionary
+
+    :return: restored order book
+    :rtype: OrderBook
+    """
+    if verify_checksum is None:
+        verify_checksum = not use_mmap
+
+    with open(path, 'rb') as state:
+        if not use_mmap:
+            return _build(memoryview(state.read()), verify_checksum, book_options)
+
+        # empty file can not be mapped, and truncated header is invalid anyway
+        if os.fstat(state.fileno()).st_size < HEADER.size:
+            raise InvalidStateException
+
+        with mmap.mmap(state.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            with memoryview(mapping) as data:
+                return _build(data, verify_checksum, book_options)
+
+
+def verify(path: str) -> bool:
+    """
+    Check header and CRC32 of the records of binary file.
+
+    :param path: path to the state file
+    :type: String
+
+    :return: True if the file is a valid state file
+    :rtype: Boolean
+    """
+    with open(path, 'rb') as state:
+        if os.fstat(state.fileno()).st_size < HEADER.size:
+            return False
+
+        with mmap.mmap(state.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            with memoryview(mapping) as data:
+                try:
+                    checksum = _read_header(data)[-1]
+
+                except InvalidStateException:
+                    return False
+
+                with data[HEADER.size:] as records:
+                    return zlib.crc32(records) == checksum
@@ -0,0 +1,755 @@
+"""
+Module with price level index for Order Book project
+
+PriceLevels keeps the prices of one side of the order book in ascending order.
+Every price level holds a FIFO queue of offer ids, so the lots of the side can
+be walked in price-time priority without sorting, and the total quantity
+of its lots, so the aggregated depth is read without walking the lots.
+
+Prices are kept in sorted blocks of BLOCK_SIZE to 2 * BLOCK_SIZE levels, and every
+block keeps the total quantity and notional (price * quantity) of its levels.
+Prefix sums of the number of levels, quantities and notionals of the blocks are
+kept in Fenwick trees, so cumulative quantity and notional of the first levels
+are read in O(log n + BLOCK_SIZE). Adding, dropping or changing a level updates
+its block and the trees in O(log n + BLOCK_SIZE). Positions of the blocks
+change only when a block is split or dropped, which happens at most once in
+BLOCK_SIZE added levels, and only then the trees are rebuilt in O(n / BLOCK_SIZE).
+
+PriceLadder has the same interface for integer prices of a bounded range.
+Levels are kept in preallocated arrays indexed by price, and the lowest and
+the highest levels are tracked by indexes, which are moved by a scan to the
+next level only when the best level is dropped. So adding and removing offers
+near the best price costs O(1). Positions of prefix sums are the prices of the
+range, so the trees are never rebuilt after the first query.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from math import ceil, floor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from order_book.exceptions import ParamValueException
+
+
+Price = Union[int, float]
+
+# number of price levels of a block. Blocks are split, when they grow twice as large
+BLOCK_SIZE = 64
+
+
+class PriceLevels:
+    """Describes a sorted index of price levels"""
+
+    __slots__ = (
+        'blocks', 'maxes', 'block_quantities', 'block_notionals', 'queues', 'quantities',
+        '_count_tree', '_quantity_tree', '_notional_tree',
+    )
+
+    def __init__(self) -> None:
+        """
+        Init a new empty price level index.
+        """
+        self.blocks: List[List[Price]] = []
+        self.maxes: List[Price] = []
+        self.block_quantities: List[int] = []
+        self.block_notionals: List[Price] = []
+        self.queues: Dict[Price, Dict[int, None]] = {}
+        self.quantities: Dict[Price, int] = {}
+
+        self._count_tree: Optional[List[int]] = None
+        self._quantity_tree: Optional[List[int]] = None
+        self._notional_tree: Optional[List[Price]] = None
+
+    def add(self, price: Price, item_id: int, quantity: int) -> None:
+        """
+        Put offer id at the end of the queue of its price level.
+        Creates the price level if it does not exist yet.
+
+        :param price: offer price
+        :type: [Integer, Float]
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: amount of lots of the offer
+        :type: Integer
+        """
+        queue = self.queues.get(price)
+
+        if queue is None:
+            queue = self.queues[price] = {}
+            self.quantities[price] = quantity
+            self._insert(price, quantity)
+
+        else:
+            self.quantities[price] += quantity
+            self._update_block(bisect_left(self.maxes, price), 0, quantity, price * quantity)
+
+        queue[item_id] = None
+
+    def remove(self, price: Price, item_id: int, quantity: int) -> None:
+        """
+        Remove offer id from the queue of its price level.
+        Drops the price level when its queue becomes empty.
+
+        :param price: offer price
+        :type: [Integer, Float]
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: amount of lots of the offer
+        :type: Integer
+        """
+        queue = self.queues[price]
+        del queue[item_id]
+
+        if not queue:
+            del self.queues[price]
+            self._delete(price, self.quantities.pop(price))
+
+        else:
+            self.quantities[price] -= quantity
+            self._update_block(bisect_left(self.maxes, price), 0, -quantity, -price * quantity)
+
+    def change(self, price: Price, delta: int) -> None:
+        """
+        Change total quantity of the price level, when quantity of its offer is changed.
+
+        :param price: price of the level
+        :type: [Integer, Float]
+
+        :param delta: difference between new and old quantity of the offer
+        :type: Integer
+        """
+        self.quantities[price] += delta
+        self._update_block(bisect_left(self.maxes, price), 0, delta, price * delta)
+
+    def _insert(self, price: Price, quantity: int) -> None:
+        blocks = self.blocks
+        maxes = self.maxes
+
+        if not blocks:
+            blocks.append([price])
+            maxes.append(price)
+            self.block_quantities.append(quantity)
+            self.block_notionals.append(price * quantity)
+            self._count_tree = None
+            return
+
+        index = min(bisect_left(maxes, price), len(maxes) - 1)
+        block = blocks[index]
+        insort(block, price)
+
+        if price > maxes[index]:
+            maxes[index] = price
+
+        if len(block) <= 2 * BLOCK_SIZE:
+            self._update_block(index, 1, quantity, price * quantity)
+            return
+
+        # split the block in halves. Positions of the next blocks are shifted, so the trees are rebuilt
+        quantities = self.quantities
+        halves = [block[:BLOCK_SIZE], block[BLOCK_SIZE:]]
+
+        blocks[index:index + 1] = halves
+        maxes[index:index + 1] = [half[-1] for half in halves]
+        self.block_quantities[index:index + 1] = [sum(quantities[level] for level in half) for half in halves]
+        self.block_notionals[index:index + 1] = [
+            sum(level * quantities[level] for level in half) for half in halves
+        ]
+        self._count_tree = None
+
+    def _delete(self, price: Price, quantity: int) -> None:
+        maxes = self.maxes
+        index = bisect_left(maxes, price)
+        block = self.blocks[index]
+        del block[bisect_left(block, price)]
+
+        if block:
+            maxes[index] = block[-1]
+            self._update_block(index, -1, -quantity, -price * quantity)
+            return
+
+        # drop the empty block. Positions of the next blocks are shifted, so the trees are rebuilt
+        del self.blocks[index]
+        del maxes[index]
+        del self.block_quantities[index]
+        del self.block_notionals[index]
+        self._count_tree = None
+
+    def _update_block(self, index: int, count: int, quantity: int, notional: Price) -> None:
+        self.block_quantities[index] += quantity
+        self.block_notionals[index] += notional
+
+        count_tree = self._count_tree
+
+        if count_tree is None:
+            return
+
+        quantity_tree = self._quantity_tree
+        notional_tree = self._notional_tree
+        size = len(count_tree)
+        position = index + 1
+
+        while position < size:
+            count_tree[position] += count
+            quantity_tree[position] += quantity
+            notional_tree[position] += notional
+            position += position & -position
+
+    def _build(self) -> None:
+        count_tree = [0]
+        quantity_tree = [0]
+        notional_tree = [0]
+
+        count_tree.extend(len(block) for block in self.blocks)
+        quantity_tree.extend(self.block_quantities)
+        notional_tree.extend(self.block_notionals)
+
+        size = len(count_tree)
+
+        for position in range(1, size):
+            parent = position + (position & -position)
+
+            if parent < size:
+                count_tree[parent] += count_tree[position]
+                quantity_tree[parent] += quantity_tree[position]
+                notional_tree[parent] += notional_tree[position]
+
+        self._count_tree = count_tree
+        self._quantity_tree = quantity_tree
+        self._notional_tree = notional_tree
+
+    def _descend(self, tree: List[Price], limit: Price) -> Tuple[int, int, int, Price]:
+        """
+        Find the number of the first blocks, which total of the tree does not exceed the limit.
+
+        :return: number of blocks, number of their levels, their total quantity and notional
+        """
+        if self._count_tree is None:
+            self._build()
+
+        count_tree = self._count_tree
+        quantity_tree = self._quantity_tree
+        notional_tree = self._notional_tree
+        size = len(count_tree)
+        index = count = quantity = notional = 0
+        step = 1 << size.bit_length()
+
+        while step:
+            position = index + step
+
+            if position < size and tree[position] <= limit:
+                index = position
+                limit -= tree[position]
+                count += count_tree[position]
+                quantity += quantity_tree[position]
+                notional += notional_tree[position]
+
+            step >>= 1
+
+        return index, count, quantity, notional
+
+    def prefix(self, count: int) -> Tuple[int, Price]:
+        """
+        Return total quantity and notional of the first price levels.
+
+        :param count: number of the lowest price levels
+        :type: Integer
+
+        :return: total quantity and total price * quantity of the levels
+        :rtype: Tuple
+        """
+        if self._count_tree is None:
+            self._build()
+
+        index, whole, quantity, notional = self._descend(self._count_tree, count)
+
+        if whole < count:
+            quantities = self.quantities
+
+            for price in islice(self.blocks[index], count - whole):
+                quantity += quantities[price]
+                notional += price * quantities[price]
+
+        return quantity, notional
+
+    def search(self, quantity: int) -> int:
+        """
+        Return the number of the lowest price levels, which total quantity
+        does not exceed the given quantity.
+
+        :param quantity: limit of total quantity
+        :type: Integer
+
+        :return: number of price levels
+        :rtype: Integer
+        """
+        if self._count_tree is None:
+            self._build()
+
+        index, count, whole_quantity, _ = self._descend(self._quantity_tree, quantity)
+
+        if index < len(self.blocks):
+            quantities = self.quantities
+            quantity -= whole_quantity
+
+            for price in self.blocks[index]:
+                if quantities[price] > quantity:
+                    break
+
+                quantity -= quantities[price]
+                count += 1
+
+        return count
+
+    def total(self) -> Tuple[int, Price]:
+        """
+        Return total quantity and notional of all price levels.
+        """
+        return self.prefix(len(self.queues))
+
+    def price_at(self, position: int) -> Price:
+        """
+        Return price of the level at the position of prefix sums.
+        """
+        if self._count_tree is None:
+            self._build()
+
+        index, count, _, _ = self._descend(self._count_tree, position)
+
+        return self.blocks[index][position - count]
+
+    def rank(self, price: Price, inclusive: bool = False) -> int:
+        """
+        Return the number of positions of prefix sums with prices lower than the price.
+
+        :param price: any price
+        :type: [Integer, Float]
+
+        :param inclusive: count also the position of the price itself
+        :type: Boolean
+
+        :return: number of positions
+        :rtype: Integer
+        """
+        bisect = bisect_right if inclusive else bisect_left
+        index = bisect(self.maxes, price)
+
+        if self._count_tree is None:
+            self._build()
+
+        count_tree = self._count_tree
+        position = index
+        count = 0
+
+        while position > 0:
+            count += count_tree[position]
+            position -= position & -position
+
+        if index < len(self.blocks):
+            count += bisect(self.blocks[index], price)
+
+        return count
+
+    @property
+    def prices(self) -> List[Price]:
+        """
+        Prices of the levels in ascending order.
+        """
+        return [price for block in self.blocks for price in block]
+
+    def queue(self, price: Price) -> Dict[int, None]:
+        """
+        Return queue of offer ids of the price level.
+        """
+        return self.queues[price]
+
+    def quantity(self, price: Price) -> int:
+        """
+        Return total quantity of the price level.
+        """
+        return self.quantities[price]
+
+    def top(self, count: int, reverse: bool = False) -> List[Tuple[Price, int]]:
+        """
+        Return prices and total quantities of the first price levels.
+
+        :param count: number of price levels
+        :type: Integer
+
+        :param reverse: start from the highest price
+        :type: Boolean
+
+        :return: price and total quantity of every level
+        :rtype: List
+        """
+        if count <= 0:
+            return []
+
+        quantities = self.quantities
+        levels = reversed(self) if reverse else iter(self)
+
+        return [(price, quantities[price]) for price, _ in islice(levels, count)]
+
+    def lowest(self) -> Optional[Price]:
+        """
+        Return the lowest price of the index or None if the index is empty.
+        """
+        return self.blocks[0][0] if self.blocks else None
+
+    def highest(self) -> Optional[Price]:
+        """
+        Return the highest price of the index or None if the index is empty.
+        """
+        return self.maxes[-1] if self.maxes else None
+
+    def __len__(self) -> int:
+        return len(self.queues)
+
+    def __iter__(self) -> Iterator[Tuple[Price, Dict[int, None]]]:
+        queues = self.queues
+
+        for block in self.blocks:
+            for price in block:
+                yield price, queues[price]
+
+    def __reversed__(self) -> Iterator[Tuple[Price, Dict[int, None]]]:
+        queues = self.queues
+
+        for block in reversed(self.blocks):
+            for price in reversed(block):
+                yield price, queues[price]
+
+
+class PriceLadder(PriceLevels):
+    """Describes a dense index of price levels of a bounded range of integer prices"""
+
+    __slots__ = ('min_price', 'max_price', 'lowest_index', 'highest_index', 'count')
+
+    def __init__(self, min_price: int, max_price: int) -> None:
+        """
+        Init a new empty price ladder.
+        Memory is allocated for every price of the range at once.
+
+        :param min_price: the lowest price of the range
+        :type: Integer
+
+        :param max_price: the highest price of the range
+        :type: Integer
+        """
+        size = max_price - min_price + 1
+
+        self.min_price: int = min_price
+        self.max_price: int = max_price
+
+        self.queues: List[Optional[Dict[int, None]]] = [None] * size
+        self.quantities: array = array('q', bytes(8 * size))
+
+        self.lowest_index: Optional[int] = None
+        self.highest_index: Optional[int] = None
+        self.count: int = 0
+
+        self._quantity_tree = None
+        self._notional_tree = None
+
+    def add(self, price: int, item_id: int, quantity: int) -> None:
+        """
+        Put offer id at the end of the queue of its price level.
+        Creates the price level if it does not exist yet.
+
+        :param price: offer price within the range
+        :type: Integer
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: amount of lots of the offer
+        :type: Integer
+        """
+        index = price - self.min_price
+        # total quantity of the level is updated first: it may not fit into the array
+        self._add_quantity(index, quantity)
+
+        queue = self.queues[index]
+
+        if queue is None:
+            queue = self.queues[index] = {}
+            self.count += 1
+
+            if self.lowest_index is None or index < self.lowest_index:
+                self.lowest_index = index
+
+            if self.highest_index is None or index > self.highest_index:
+                self.highest_index = index
+
+        queue[item_id] = None
+        self._update(price, quantity)
+
+    def _add_quantity(self, index: int, quantity: int) -> None:
+        try:
+            self.quantities[index] += quantity
+
+        except OverflowError:
+            raise ParamValueException
+
+    def remove(self, price: int, item_id: int, quantity: int) -> None:
+        """
+        Remove offer id from the queue of its price level.
+        Drops the price level when its queue becomes empty.
+
+        :param price: offer price within the range
+        :type: Integer
+
+        :param item_id: offer id
+        :type: Integer
+
+        :param quantity: amount of lots of the offer
+        :type: Integer
+        """
+        index = price - self.min_price
+        queues = self.queues
+        queue = queues[index]
+        del queue[item_id]
+
+        self.quantities[index] -= quantity
+        self._update(price, -quantity)
+
+        if queue:
+            return
+
+        queues[index] = None
+        self.count -= 1
+
+        if not self.count:
+            self.lowest_index = self.highest_index = None
+            return
+
+        if index == self.lowest_index:
+            while queues[index] is None:
+                index += 1
+            self.lowest_index = index
+
+        elif index == self.highest_index:
+            while queues[index] is None:
+                index -= 1
+            self.highest_index = index
+
+    def change(self, price: int, delta: int) -> None:
+        """
+        Change total quantity of the price level, when quantity of its offer is changed.
+
+        :param price: price of the level
+        :type: Integer
+
+        :param delta: difference between new and old quantity of the offer
+        :type: Integer
+        """
+        self._add_quantity(price - self.min_price, delta)
+        self._update(price, delta)
+
+    def _update(self, price: int, delta: int) -> None:
+        quantity_tree = self._quantity_tree
+
+        if quantity_tree is None:
+            return
+
+        notional_tree = self._notional_tree
+        notional = price * delta
+        size = len(quantity_tree)
+        position = price - self.min_price + 1
+
+        while position < size:
+            quantity_tree[position] += delta
+            notional_tree[position] += notional
+            position += position & -position
+
+    def _build(self) -> None:
+        # sums of many levels may not fit into 64-bit arrays
+        quantity_tree = [0]
+        notional_tree = [0]
+
+        quantity_tree.extend(self.quantities)
+        notional_tree.extend(
+            price * quantity for price, quantity in enumerate(self.quantities, self.min_price)
+        )
+
+        size = len(quantity_tree)
+
+        for position in range(1, size):
+            parent = position + (position & -position)
+
+            if parent < size:
+                quantity_tree[parent] += quantity_tree[position]
+                notional_tree[parent] += notional_tree[position]
+
+        self._quantity_tree = quantity_tree
+        self._notional_tree = notional_tree
+
+    def prefix(self, count: int) -> Tuple[int, Price]:
+        """
+        Return total quantity and notional of the first price levels.
+
+        :param count: number of the lowest price levels
+        :type: Integer
+
+        :return: total quantity and total price * quantity of the levels
+        :rtype: Tuple
+        """
+        if self._quantity_tree is None:
+            self._build()
+
+        quantity_tree = self._quantity_tree
+        notional_tree = self._notional_tree
+        quantity = 0
+        notional = 0
+
+        while count > 0:
+            quantity += quantity_tree[count]
+            notional += notional_tree[count]
+            count -= count & -count
+
+        return quantity, notional
+
+    def search(self, quantity: int) -> int:
+        """
+        Return the number of the lowest price levels, which total quantity
+        does not exceed the given quantity.
+
+        :param quantity: limit of total quantity
+        :type: Integer
+
+        :return: number of price levels
+        :rtype: Integer
+        """
+        if self._quantity_tree is None:
+            self._build()
+
+        quantity_tree = self._quantity_tree
+        size = len(quantity_tree)
+        count = 0
+        step = 1 << size.bit_length()
+
+        while step:
+            position = count + step
+
+            if position < size and quantity_tree[position] <= quantity:
+                count = position
+                quantity -= quantity_tree[position]
+
+            step >>= 1
+
+        return count
+
+    @property
+    def prices(self) -> List[int]:
+        """
+        Prices of the levels in ascending order. Walks the range between the best levels.
+        """
+        return [price for price, _ in self]
+
+    def total(self) -> Tuple[int, int]:
+        """
+        Return total quantity and notional of all price levels.
+        """
+        return self.prefix(len(self.queues))
+
+    def price_at(self, position: int) -> int:
+        """
+        Return price of the level at the position of prefix sums.
+        """
+        return self.min_price + position
+
+    def rank(self, price: Price, inclusive: bool = False) -> int:
+        """
+        Return the number of positions of prefix sums with prices lower than the price.
+
+        :param price: any price
+        :type: [Integer, Float]
+
+        :param inclusive: count also the position of the price itself
+        :type: Boolean
+
+        :return: number of positions
+        :rtype: Integer
+        """
+        count = floor(price) + 1 if inclusive else ceil(price)
+
+        return min(max(count - self.min_price, 0), len(self.queues))
+
+    def queue(self, price: int) -> Dict[int, None]:
+        """
+        Return queue of offer ids of the price level.
+        """
+        return self.queues[price - self.min_price]
+
+    def quantity(self, price: int) -> int:
+        """
+        Return total quantity of the price level.
+        """
+        return self.quantities[price - self.min_price]
+
+    def top(self, count: int, reverse: bool = False) -> List[Tuple[int, int]]:
+        """
+        Return prices and total quantities of the first price levels.
+
+        :param count: number of price levels
+        :type: Integer
+
+        :param reverse: start from the highest price
+        :type: Boolean
+
+        :return: price and total quantity of every level
+        :rtype: List
+        """
+        if count <= 0:
+            return []
+
+        quantities = self.quantities
+        min_price = self.min_price
+        levels = reversed(self) if reverse else iter(self)
+
+        return [(price, quantities[price - min_price]) for price, _ in islice(levels, count)]
+
+    def lowest(self) -> Optional[int]:
+        """
+        Return the lowest price of the index or None if the index is empty.
+        """
+        return None if self.lowest_index is None else self.lowest_index + self.min_price
+
+    def highest(self) -> Optional[int]:
+        """
+        Return the highest price of the index or None if the index is empty.
+        """
+        return None if self.highest_index is None else self.highest_index + self.min_price
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[int, None]]]:
+        if not self.count:
+            return
+
+        queues = self.queues
+        min_price = self.min_price
+
+        for index in range(self.lowest_index, self.highest_index + 1):
+            queue = queues[index]
+
+            if queue is not None:
+                yield index + min_price, queue
+
+    def __reversed__(self) -> Iterator[Tuple[int, Dict[int, None]]]:
+        if not self.count:
+            return
+
+        queues = self.queues
+        min_price = self.min_price
+
+        for index in range(self.highest_index, self.lowest_index - 1, -1):
+            queue = queues[index]
+
+            if queue is not None:
+                yield index + min_price, queue
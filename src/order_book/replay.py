@@ -0,0 +1,159 @@
+"""
+Module with order events replay for Order Book project
+
+Events are tuples:
+
+- ('add', trade_type, price, quantity) - add offer into the order book.
+
+- ('purge', offer_id) - purge offer from the order book.
+
+read_csv and read_jsonl read events from a log line by line.
+replay applies a stream of events to the order book in chunks, so a log
+is never loaded into memory as a whole.
+"""
+
+from collections import namedtuple
+import csv
+from itertools import groupby, islice
+import json
+from operator import itemgetter
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from order_book.depth_of_market import MarketView, OrderBook
+from order_book.exceptions import ParamTypeException, ParamValueException
+
+
+Event = Tuple[Any, ...]
+
+ReplayStats = namedtuple('ReplayStats', ['events', 'seconds', 'events_per_second'])
+
+ADD = 'add'
+PURGE = 'purge'
+
+
+def _parse_price(value: str) -> Union[int, float]:
+    return float(value) if '.' in value or 'e' in value.lower() else int(value)
+
+
+def _event(record: Dict[str, Any]) -> Event:
+    action = record.get('action')
+
+    if action == ADD:
+        return ADD, record['trade_type'], record['price'], record['quantity']
+
+    elif action == PURGE:
+        return PURGE, record['offer_id']
+
+    else:
+        raise ParamValueException
+
+
+def read_csv(path: str) -> Iterator[Event]:
+    """
+    Read events from CSV log with header:
+    action,trade_type,price,quantity,offer_id
+
+    :param path: path to the log
+    :type: String
+
+    :return: events in the order of the log
+    :rtype: Iterator
+    """
+    with open(path, newline='') as log:
+        for record in csv.DictReader(log):
+            if record['action'] == ADD:
+                record['price'] = _parse_price(record['price'])
+                record['quantity'] = int(record['quantity'])
+
+            elif record['action'] == PURGE:
+                record['offer_id'] = int(record['offer_id'])
+
+            yield _event(record)
+
+
+def read_jsonl(path: str) -> Iterator[Event]:
+    """
+    Read events from JSON lines log. Every line is an object, e.g.:
+    {"action": "add", "trade_type": "asks", "price": 1.5, "quantity": 10}
+    {"action": "purge", "offer_id": 1}
+
+    :param path: path to the log
+    :type: String
+
+    :return: events in the order of the log
+    :rtype: Iterator
+    """
+    with open(path) as log:
+        for line in log:
+            if line.strip():
+                yield _event(json.loads(line))
+
+
+def replay(
+    book: OrderBook,
+    events: Iterable[Event],
+    chunk_size: int = 10000,
+    snapshot_every: Optional[int] = None,
+    on_snapshot: Optional[Callable[[int, MarketView], None]] = None,
+    ) -> ReplayStats:
+    """
+    Apply events to the order book.
+    Events are taken from the stream by chunks, and every run of events with
+    the same action inside a chunk is applied by add_offers or purge_offers.
+
+    :param book: order book to be changed
+    :type: OrderBook
+
+    :param events: stream of events
+    :type: Iterable
+
+    :param chunk_size: maximum number of events taken from the stream at once. Default value: 10000
+    :type: Integer
+
+    :param snapshot_every: call on_snapshot after every N applied events
+    :type: Integer
+
+    :param on_snapshot: receives number of applied events and market view
+    :type: Callable
+
+    :return: number of applied events, elapsed time and throughput
+    :rtype: ReplayStats
+    """
+    if type(chunk_size) != int or (snapshot_every is not None and type(snapshot_every) != int):
+        raise ParamTypeException
+
+    if chunk_size <= 0 or (snapshot_every is not None and snapshot_every <= 0):
+        raise ParamValueException
+
+    events = iter(events)
+    applied = 0
+    started = perf_counter()
+
+    while True:
+        size = chunk_size
+        if snapshot_every:
+            size = min(size, snapshot_every - applied % snapshot_every)
+
+        chunk = list(islice(events, size))
+        if not chunk:
+            break
+
+        for action, run in groupby(chunk, key=itemgetter(0)):
+            if action == ADD:
+                book.add_offers(event[1:] for event in run)
+
+            elif action == PURGE:
+                book.purge_offers(event[1] for event in run)
+
+            else:
+                raise ParamValueException
+
+        applied += len(chunk)
+
+        if snapshot_every and on_snapshot is not None and not applied % snapshot_every:
+            on_snapshot(applied, book.get_market_view())
+
+    elapsed = perf_counter() - started
+
+    return ReplayStats(applied, elapsed, applied / elapsed if elapsed else 0.0)
@@ -0,0 +1,273 @@
+"""
+Module with thread-safe Order Book
+
+ThreadSafeOrderBook has the same interface as OrderBook. Asks and bids are
+guarded by separate locks, so offers of different trade types are added and
+purged independently. Offer ids are issued under their own lock.
+
+Snapshots take the immutable views of the sides under both locks. A view is
+cached only until its side is changed, so under a steady flow of writes it is
+rebuilt from every lot of the side while the locks are held: a snapshot blocks
+all writers for O(n) of the number of resting offers. Only the conversion of
+the views into the dictionaries of the snapshot happens after the locks are released.
+Operations, which touch both trade types (matching, batches, views, deltas), take
+the asks lock first and the bids lock second.
+"""
+
+from array import array
+from contextlib import contextmanager
+from threading import Lock, RLock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from order_book.book_side import LotRecord
+from order_book.depth_of_market import (
+    Deltas, Eviction, MarketView, MatchResult, OrderBook, SnapshotArrays, TradeType
+)
+
+
+class ThreadSafeOrderBook(OrderBook):
+    """Describes an order book, which can be shared between threads"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Init a new order book. Parameters are the same as of OrderBook.
+        """
+        super().__init__(*args, **kwargs)
+
+        self._id_lock = Lock()
+        self._locks = {
+            TradeType.asks: RLock(),
+            TradeType.bids: RLock(),
+        }
+
+    @contextmanager
+    def _both_locked(self) -> Iterator[None]:
+        with self._locks[TradeType.asks], self._locks[TradeType.bids]:
+            yield
+
+    def add_offer(
+        self,
+        trade_type: str = None,
+        price: Union[int, float] = None,
+        quantity: int = None
+        ) -> Union[int, MatchResult]:
+        """
+        Add offer in the order book under the lock of its trade type.
+        See OrderBook.add_offer
+        """
+        self._validate_offer(trade_type, price, quantity)
+
+        if self.tick_size is not None:
+            price = self._to_ticks(price)
+
+        if self._price_range is not None:
+            self._check_range(price)
+
+        return self._add_locked(trade_type, price, quantity)
+
+    def add_trusted_offer(
+        self,
+        trade_type: str,
+        price: Union[int, float],
+        quantity: int
+        ) -> Union[int, MatchResult]:
+        """
+        Add offer, which is known to be valid, under the lock of its trade type.
+        See OrderBook.add_trusted_offer
+        """
+        if self.tick_size is not None:
+            price = round(price / self.tick_size)
+
+        return self._add_locked(trade_type, price, quantity)
+
+    def _add_locked(self, trade_type: str, price: Union[int, float], quantity: int) -> Union[int, MatchResult]:
+        if self.matching:
+            with self._both_locked():
+                return self._export_result(self._match_offer(trade_type, price, quantity))
+
+        with self._locks[trade_type]:
+            return self._place_offer(trade_type, price, quantity)
+
+    def _next_offer_id(self) -> int:
+        """
+        Issue id of a new offer under the id lock, as offers of both trade types are added at once.
+        """
+        with self._id_lock:
+            self.offer_id += 1
+
+            return self.offer_id
+
+    def add_offers(self, offers: Iterable[Tuple[str, Union[int, float], int]]) -> Union[array, List[MatchResult]]:
+        """
+        Add batch of offers under both locks.
+        See OrderBook.add_offers
+        """
+        with self._both_locked():
+            return super().add_offers(offers)
+
+    def purge_offer(self, item_id: int = None) -> Dict[str, Union[int, float]]:
+        """
+        Purge offer from the order book under the lock of its trade type.
+        See OrderBook.purge_offer
+        """
+        side = self.offer_sides.get(item_id)
+
+        if side is None:
+            return super().purge_offer(item_id)
+
+        with self._locks[side.trade_type]:
+            return super().purge_offer(item_id)
+
+    def amend_offer(
+        self,
+        item_id: int = None,
+        quantity: int = None,
+        price: Union[int, float] = None
+        ) -> Union[Dict[str, Union[int, float]], MatchResult]:
+        """
+        Amend offer under the lock of its trade type. In matching mode under both locks.
+        See OrderBook.amend_offer
+        """
+        side = self.offer_sides.get(item_id)
+
+        if side is None:
+            return super().amend_offer(item_id, quantity, price)
+
+        if self.matching:
+            with self._both_locked():
+                return super().amend_offer(item_id, quantity, price)
+
+        with self._locks[side.trade_type]:
+            return super().amend_offer(item_id, quantity, price)
+
+    def purge_offers(self, item_ids: Iterable[int]) -> List[Dict[str, Union[int, float]]]:
+        """
+        Purge batch of offers under both locks.
+        See OrderBook.purge_offers
+        """
+        with self._both_locked():
+            return super().purge_offers(item_ids)
+
+    def get_offers_data(self, item_id: int = None) -> Dict[str, Union[int, float]]:
+        """
+        Return data of one offer under the lock of its trade type.
+        See OrderBook.get_offers_data
+        """
+        side = self.offer_sides.get(item_id)
+
+        if side is None:
+            return super().get_offers_data(item_id)
+
+        with self._locks[side.trade_type]:
+            return super().get_offers_data(item_id)
+
+    def take_evicted(self) -> List[Eviction]:
+        """
+        Return evicted offers under both locks.
+        See OrderBook.take_evicted
+        """
+        with self._both_locked():
+            return super().take_evicted()
+
+    def _ordered_lots(self, best_first: bool = False) -> Dict[str, Tuple[LotRecord, ...]]:
+        """
+        Return views of asks and bids under both locks. Views of changed sides are rebuilt
+        in O(n) while the locks are held, lots are copied into the snapshot after the locks are released.
+        """
+        with self._both_locked():
+            return {
+                TradeType.asks: self.asks.view(),
+                TradeType.bids: self.bids.view(reverse=best_first),
+            }
+
+    def _copy_lots(self, ordered_lots: Dict[str, Iterable[LotRecord]]) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        """
+        Copy lot records of asks and bids into a snapshot.
+        """
+        to_price = self._to_price if self.tick_size is not None else None
+
+        return {
+            trade_type: [
+                {'price': to_price(lot.price) if to_price else lot.price, 'quantity': lot.quantity}
+                for lot in lots
+            ]
+            for trade_type, lots in ordered_lots.items()
+        }
+
+    def top_of_book(self, count: int = 5) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        """
+        Returns the best offers of asks and bids under both locks.
+        See OrderBook.top_of_book
+        """
+        with self._both_locked():
+            return super().top_of_book(count)
+
+    def get_market_snapshot_arrays(self) -> Dict[str, SnapshotArrays]:
+        """
+        Returns snapshot of market as NumPy arrays under both locks.
+        See OrderBook.get_market_snapshot_arrays
+        """
+        with self._both_locked():
+            return super().get_market_snapshot_arrays()
+
+    def get_market_depth(self, levels: int = 10) -> Dict[str, List[Dict[str, Union[int, float]]]]:
+        """
+        Returns aggregated snapshot of market under both locks.
+        See OrderBook.get_market_depth
+        """
+        with self._both_locked():
+            return super().get_market_depth(levels)
+
+    def vwap_for_quantity(self, trade_type: str = None, quantity: int = None) -> Optional[float]:
+        """
+        Return average execution price of the quantity under both locks.
+        See OrderBook.vwap_for_quantity
+        """
+        with self._both_locked():
+            return super().vwap_for_quantity(trade_type, quantity)
+
+    def quantity_within(self, trade_type: str = None, price_band: Union[int, float] = None) -> int:
+        """
+        Return quantity within the price band from the mid price under both locks.
+        See OrderBook.quantity_within
+        """
+        with self._both_locked():
+            return super().quantity_within(trade_type, price_band)
+
+    def cumulative_depth(self, trade_type: str = None, levels: int = 10) -> List[Dict[str, Union[int, float]]]:
+        """
+        Return cumulative quantity of the best price levels under both locks.
+        See OrderBook.cumulative_depth
+        """
+        with self._both_locked():
+            return super().cumulative_depth(trade_type, levels)
+
+    def get_market_view(self) -> MarketView:
+        """
+        Returns read-only view of market under both locks.
+        See OrderBook.get_market_view
+        """
+        with self._both_locked():
+            return super().get_market_view()
+
+    def get_deltas(self, since_version: int) -> Deltas:
+        """
+        Returns changes of the order book made after the given version under both locks.
+        See OrderBook.get_deltas
+        """
+        with self._both_locked():
+            return super().get_deltas(since_version)
+
+    def best_ask(self) -> Optional[Union[int, float]]:
+        """
+        Return the lowest ask price under the asks lock.
+        """
+        with self._locks[TradeType.asks]:
+            return super().best_ask()
+
+    def best_bid(self) -> Optional[Union[int, float]]:
+        """
+        Return the highest bid price under the bids lock.
+        """
+        with self._locks[TradeType.bids]:
+            return super().best_bid()
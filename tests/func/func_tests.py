@@ -1,11 +1,22 @@
 """Module with functional tests for OrderBook"""
+import asyncio
 from random import randint, choice
+from threading import Thread
 from typing import Callable, NoReturn
 
 import pytest
 
+from order_book.aio import AsyncOrderBook
+from order_book.book_side import LadderBookSide
 from order_book.depth_of_market import OrderBook
-from order_book.exceptions import NoElementException, TradeTypeOverflowedException
+from order_book.exceptions import (
+    InvalidStateException, NoElementException, ParamValueException, TradeTypeOverflowedException
+)
+from order_book.journal import Journal, recover
+from order_book.manager import BookManager
+from order_book.persistence import load, save, verify
+from order_book.replay import read_csv, read_jsonl, replay
+from order_book.threadsafe import ThreadSafeOrderBook
 
 
 def test_overflow_asks_market_default_depth(new_order_book: Callable[[], OrderBook]) -> NoReturn:
@@ -352,3 +363,766 @@ def test_get_market_snapshot(filled_order_book: Callable[[], OrderBook]) -> NoRe
     bids_prices = [bid['price'] for bid in snapshot['bids']]
     sorted_bids_prices = sorted(bids_prices)
     assert bids_prices == sorted_bids_prices
+
+
+def test_best_prices_follow_purge(filled_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Purge best offers and check, that best prices are updated
+    """
+    book = filled_order_book
+
+    assert book.best_ask() == min(ask['price'] for ask in book.asks.values())
+    assert book.best_bid() == max(bid['price'] for bid in book.bids.values())
+
+    for offer_key in [key for key, ask in book.asks.items() if ask['price'] == book.best_ask()]:
+        book.purge_offer(offer_key)
+
+    for offer_key in [key for key, bid in book.bids.items() if bid['price'] == book.best_bid()]:
+        book.purge_offer(offer_key)
+
+    assert book.best_ask() == min((ask['price'] for ask in book.asks.values()), default=None)
+    assert book.best_bid() == max((bid['price'] for bid in book.bids.values()), default=None)
+
+
+def test_get_market_snapshot_time_priority(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get market snapshot and check, that offers with equal price are ordered by arrival
+    """
+    book = new_order_book
+
+    book.add_offer('asks', 2, 1)
+    book.add_offer('asks', 1, 2)
+    book.add_offer('asks', 2, 3)
+    book.add_offer('asks', 1, 4)
+
+    snapshot = book.get_market_snapshot()
+
+    assert snapshot['asks'] == [
+        {'price': 1, 'quantity': 2},
+        {'price': 1, 'quantity': 4},
+        {'price': 2, 'quantity': 1},
+        {'price': 2, 'quantity': 3},
+    ]
+
+    # snapshot must not share lots with the book
+    snapshot['asks'][0]['quantity'] = 100500
+    assert book.get_offers_data(2)['quantity'] == 2
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_get_market_snapshot_best_first(storage: str) -> NoReturn:
+    """
+    Fill order book with random offers and check, that best first snapshot
+    is ordered by the best price, then by arrival
+    """
+    book = OrderBook(200, storage=storage)
+    added = {'asks': [], 'bids': []}
+
+    for _ in range(book.depth):
+        trade_type = choice(['asks', 'bids'])
+        price = randint(10, 20)
+        quantity = randint(1, 100)
+        book.add_offer(trade_type, price, quantity)
+        added[trade_type].append({'price': price, 'quantity': quantity})
+
+    snapshot = book.get_market_snapshot(best_first=True)
+
+    # sorted is stable, so offers with equal price keep the order of arrival
+    assert snapshot['asks'] == sorted(added['asks'], key=lambda lot: lot['price'])
+    assert snapshot['bids'] == sorted(added['bids'], key=lambda lot: -lot['price'])
+
+
+def test_prefix_sum_queries_many_levels() -> NoReturn:
+    """
+    Add and purge offers over many price levels, query them between the changes
+    and check, that dict order book matches ladder order book
+    """
+    dict_book = OrderBook(2000)
+    ladder_book = OrderBook(2000, storage='ladder', price_range=(1, 3000))
+
+    for number in range(3000):
+        offer_keys = list(dict_book.offer_sides)
+
+        if offer_keys and randint(0, 2) == 0:
+            offer_key = choice(offer_keys)
+            dict_book.purge_offer(offer_key)
+            ladder_book.purge_offer(offer_key)
+
+        else:
+            trade_type = choice(['asks', 'bids'])
+            price = randint(1, 1500) if trade_type == 'bids' else randint(1501, 3000)
+            quantity = randint(1, 10)
+            dict_book.add_offer(trade_type, price, quantity)
+            ladder_book.add_offer(trade_type, price, quantity)
+
+        if number % 10 == 0:
+            for trade_type in ('asks', 'bids'):
+                quantity = randint(1, 5000)
+                price_band = randint(0, 1500)
+                assert dict_book.vwap_for_quantity(trade_type, quantity) == ladder_book.vwap_for_quantity(
+                    trade_type, quantity
+                )
+                assert dict_book.quantity_within(trade_type, price_band) == ladder_book.quantity_within(
+                    trade_type, price_band
+                )
+
+    assert dict_book.cumulative_depth('asks', 50) == ladder_book.cumulative_depth('asks', 50)
+
+
+def test_compact_storage_same_as_dict_storage() -> NoReturn:
+    """
+    Fill dict and compact order books with same offers and check, that they match
+    """
+    dict_book = OrderBook(50)
+    compact_book = OrderBook(50, storage='compact')
+
+    for _ in range(dict_book.depth):
+        trade_type = choice(['asks', 'bids'])
+        price = randint(10, 50)
+        quantity = randint(100, 200)
+
+        offer_id = dict_book.add_offer(trade_type, price, quantity)
+        assert compact_book.add_offer(trade_type, price, quantity) == offer_id
+
+    for offer_key in range(1, dict_book.offer_id + 1, 3):
+        assert dict_book.purge_offer(offer_key) == compact_book.purge_offer(offer_key)
+
+    for offer_key in list(dict_book.asks.keys()) + list(dict_book.bids.keys()):
+        assert dict_book.get_offers_data(offer_key) == compact_book.get_offers_data(offer_key)
+
+    assert dict_book.get_market_snapshot() == compact_book.get_market_snapshot()
+    assert dict_book.get_market_view() == compact_book.get_market_view()
+
+    with pytest.raises(NoElementException):
+        compact_book.purge_offer(1)
+
+
+@pytest.mark.parametrize('matching', [False, True])
+def test_ladder_storage_same_as_dict_storage(matching: bool) -> NoReturn:
+    """
+    Add, amend and purge the same random offers in dict and ladder order books
+    and check, that they match
+    """
+    dict_book = OrderBook(200, matching=matching)
+    ladder_book = OrderBook(200, storage='ladder', matching=matching, price_range=(10, 50))
+
+    for _ in range(300):
+        offer_keys = list(dict_book.offer_sides)
+
+        if offer_keys and randint(0, 3) == 0:
+            offer_key = choice(offer_keys)
+            assert dict_book.purge_offer(offer_key) == ladder_book.purge_offer(offer_key)
+
+        elif offer_keys and randint(0, 3) == 0:
+            offer_key = choice(offer_keys)
+            quantity = randint(1, 200)
+            price = randint(10, 50)
+            assert dict_book.amend_offer(offer_key, quantity, price) == ladder_book.amend_offer(offer_key, quantity, price)
+
+        else:
+            trade_type = choice(['asks', 'bids'])
+            price = randint(10, 50)
+            quantity = randint(1, 200)
+            assert dict_book.add_offer(trade_type, price, quantity) == ladder_book.add_offer(trade_type, price, quantity)
+
+        assert dict_book.best_ask() == ladder_book.best_ask()
+        assert dict_book.best_bid() == ladder_book.best_bid()
+
+    assert dict_book.get_market_snapshot() == ladder_book.get_market_snapshot()
+    assert dict_book.get_market_view() == ladder_book.get_market_view()
+    assert dict_book.get_market_depth(5) == ladder_book.get_market_depth(5)
+
+    for trade_type in ('asks', 'bids'):
+        for quantity in range(1, 1000, 37):
+            assert dict_book.vwap_for_quantity(trade_type, quantity) == ladder_book.vwap_for_quantity(trade_type, quantity)
+
+        for price_band in (0, 1, 2.5, 10, 50):
+            assert dict_book.quantity_within(trade_type, price_band) == ladder_book.quantity_within(trade_type, price_band)
+
+    with pytest.raises(ParamValueException):
+        ladder_book.add_offer('asks', 51, 1)
+
+
+def test_overflow_add_offers(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Add batch of offers, which overflows asks, and check, that nothing is added
+    """
+    book = new_order_book
+
+    book.add_offers(('asks', 1, 1) for _ in range(book.depth - 1))
+
+    with pytest.raises(TradeTypeOverflowedException):
+        book.add_offers([('bids', 1, 1), ('asks', 1, 1), ('asks', 1, 1)])
+
+    assert len(book.asks) == book.depth - 1
+    assert not book.bids
+    assert book.offer_id == book.depth - 1
+
+    item_ids = book.add_offers([('bids', 1, 1), ('asks', 1, 1)])
+
+    assert list(item_ids) == [book.depth, book.depth + 1]
+    assert len(book.asks) == book.depth
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_get_market_snapshot_arrays(storage: str) -> NoReturn:
+    """
+    Get market snapshot as NumPy arrays and check, that it matches market snapshot
+    """
+    pytest.importorskip('numpy')
+    book = OrderBook(storage=storage)
+
+    for _ in range(book.depth):
+        book.add_offer('asks', randint(10, 50), randint(100, 200))
+        book.add_offer('bids', randint(10, 50) / 4, randint(100, 200))
+
+    snapshot = book.get_market_snapshot()
+    arrays_snapshot = book.get_market_snapshot_arrays()
+
+    for trade_type in ('asks', 'bids'):
+        assert list(arrays_snapshot[trade_type].price) == [lot['price'] for lot in snapshot[trade_type]]
+        assert list(arrays_snapshot[trade_type].quantity) == [lot['quantity'] for lot in snapshot[trade_type]]
+
+
+def test_matching_book_never_crossed() -> NoReturn:
+    """
+    Add random offers into matching order book and check, that it is never crossed
+    and executed quantity is the same for both trade types
+    """
+    book = OrderBook(1000, matching=True)
+    added = {'asks': 0, 'bids': 0}
+    executed = 0
+
+    for _ in range(500):
+        trade_type = choice(['asks', 'bids'])
+        quantity = randint(1, 100)
+
+        result = book.add_offer(trade_type, randint(90, 110), quantity)
+
+        added[trade_type] += quantity
+        executed += sum(fill.quantity for fill in result.fills)
+        assert sum(fill.quantity for fill in result.fills) + result.remaining == quantity
+
+        if book.asks and book.bids:
+            assert book.best_bid() < book.best_ask()
+
+    resting_asks = sum(lot['quantity'] for lot in book.asks.values())
+    resting_bids = sum(lot['quantity'] for lot in book.bids.values())
+
+    assert added['asks'] - resting_asks == executed
+    assert added['bids'] - resting_bids == executed
+
+
+def test_matching_overflow() -> NoReturn:
+    """
+    Add offer into full trade type of matching order book
+    """
+    book = OrderBook(2, matching=True)
+
+    book.add_offers([('bids', 10, 1), ('bids', 11, 1), ('asks', 12, 1), ('asks', 13, 1)])
+
+    # remainder can not be placed, nothing is executed
+    with pytest.raises(TradeTypeOverflowedException):
+        book.add_offer('asks', 10, 3)
+
+    assert len(book.bids) == 2
+    assert len(book.asks) == 2
+
+    # fully executed offer does not need a place
+    result = book.add_offer('asks', 10, 2)
+
+    assert result.remaining == 0
+    assert not book.bids
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_get_market_depth(storage: str) -> NoReturn:
+    """
+    Add, execute and purge offers and check, that aggregated snapshot matches lots
+    """
+    book = OrderBook(100, storage=storage, matching=True)
+
+    for _ in range(100):
+        book.add_offer(choice(['asks', 'bids']), randint(10, 30), randint(1, 50))
+
+    for offer_key in list(book.asks.keys())[::3] + list(book.bids.keys())[::3]:
+        book.purge_offer(offer_key)
+
+    market_depth = book.get_market_depth(5)
+
+    for trade_type, side in (('asks', book.asks), ('bids', book.bids)):
+        totals = {}
+        for lot in side.values():
+            totals[lot['price']] = totals.get(lot['price'], 0) + lot['quantity']
+
+        prices = sorted(totals, reverse=trade_type == 'bids')[:5]
+        assert market_depth[trade_type] == [{'price': price, 'quantity': totals[price]} for price in prices]
+
+
+def test_replay_events(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Replay stream of events in small chunks with snapshots
+    """
+    book = new_order_book
+    events = [
+        ('add', 'asks', 10, 1),
+        ('add', 'bids', 9, 2),
+        ('add', 'asks', 11, 3),
+        ('purge', 1),
+        ('add', 'bids', 8.5, 4),
+    ]
+    snapshots = []
+
+    stats = replay(
+        book, iter(events), chunk_size=3, snapshot_every=2,
+        on_snapshot=lambda applied, view: snapshots.append((applied, view.version)),
+    )
+
+    assert stats.events == len(events)
+    assert snapshots == [(2, 2), (4, 4)]
+
+    assert book.get_market_snapshot() == {
+        'asks': [{'price': 11, 'quantity': 3}],
+        'bids': [{'price': 8.5, 'quantity': 4}, {'price': 9, 'quantity': 2}],
+    }
+
+
+def test_replay_logs(tmp_path) -> NoReturn:
+    """
+    Replay CSV and JSON lines logs and check, that order books match
+    """
+    csv_log = tmp_path / 'events.csv'
+    csv_log.write_text(
+        'action,trade_type,price,quantity,offer_id\n'
+        'add,asks,10.5,1,\n'
+        'add,bids,9,2,\n'
+        'purge,,,,1\n'
+        'add,asks,11,3,\n'
+    )
+
+    jsonl_log = tmp_path / 'events.jsonl'
+    jsonl_log.write_text(
+        '{"action": "add", "trade_type": "asks", "price": 10.5, "quantity": 1}\n'
+        '{"action": "add", "trade_type": "bids", "price": 9, "quantity": 2}\n'
+        '{"action": "purge", "offer_id": 1}\n'
+        '{"action": "add", "trade_type": "asks", "price": 11, "quantity": 3}\n'
+    )
+
+    csv_book = OrderBook()
+    jsonl_book = OrderBook()
+
+    assert replay(csv_book, read_csv(str(csv_log))).events == 4
+    assert replay(jsonl_book, read_jsonl(str(jsonl_log))).events == 4
+
+    assert csv_book.get_market_snapshot() == jsonl_book.get_market_snapshot()
+    assert csv_book.get_offers_data(2) == {'price': 9, 'quantity': 2}
+    assert csv_book.offer_id == 3
+
+
+def test_replay_unknown_action(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Replay event with unknown action
+    """
+    with pytest.raises(ParamValueException):
+        replay(new_order_book, [('add', 'asks', 1, 1), ('foo', 1)])
+
+
+def test_book_manager() -> NoReturn:
+    """
+    Add offers of several instruments via book manager and gather their snapshots
+    """
+    with BookManager(workers=2) as manager:
+        results = manager.execute([
+            ('AAA', 'add_offer', ('asks', 10, 1)),
+            ('BBB', 'add_offer', ('bids', 20, 2)),
+            ('AAA', 'add_offer', ('bids', 9, 3)),
+            ('CCC', 'add_offer', ('asks', 30, 4)),
+        ])
+
+        # every instrument has its own order book and offer ids
+        assert results == [1, 1, 2, 1]
+
+        assert manager.get_offers_data('AAA', 2) == {'price': 9, 'quantity': 3}
+        assert manager.purge_offer('CCC', 1) == {'price': 30, 'quantity': 4}
+
+        with pytest.raises(NoElementException):
+            manager.purge_offer('CCC', 1)
+
+        snapshots = manager.gather_snapshots()
+
+        assert set(snapshots) == {'AAA', 'BBB', 'CCC'}
+        assert snapshots['AAA'] == {
+            'asks': [{'price': 10, 'quantity': 1}],
+            'bids': [{'price': 9, 'quantity': 3}],
+        }
+        assert not snapshots['CCC']['asks']
+
+        assert set(manager.gather_snapshots(['BBB'])) == {'BBB'}
+
+        results = manager.execute([
+            ('AAA', 'amend_offer', (1, 4)),
+            ('AAA', 'top_of_book', (1,)),
+            ('AAA', 'vwap_for_quantity', ('asks', 2)),
+            ('AAA', 'quantity_within', ('asks', 1)),
+            ('AAA', 'cumulative_depth', ('bids', 1)),
+        ])
+
+        assert results[0] == {'price': 10, 'quantity': 4}
+        assert results[1] == {'asks': [{'price': 10, 'quantity': 4}], 'bids': [{'price': 9, 'quantity': 3}]}
+        assert results[2] == 10
+        assert results[3] == 4
+        assert results[4] == [{'price': 9, 'quantity': 3}]
+
+        with pytest.raises(ParamValueException):
+            manager.execute([('AAA', 'add_trusted_offer', ('asks', 10, 1))])
+
+
+@pytest.mark.parametrize('matching', [False, True])
+def test_thread_safe_order_book(matching: bool) -> NoReturn:
+    """
+    Add and purge offers from several threads and check, that ids are unique
+    and the order book is consistent
+    """
+    book = ThreadSafeOrderBook(10000, matching=matching)
+    added_ids = [[] for _ in range(8)]
+    snapshots = []
+
+    def work(index: int) -> None:
+        trade_type = 'asks' if index % 2 else 'bids'
+        for number in range(500):
+            price = 100 + number % 7 if trade_type == 'asks' else 90 + number % 7
+            added_ids[index].append(book.add_offer(trade_type, price, 1))
+
+            if number % 3 == 0:
+                item_id = added_ids[index][-1]
+                item_id = item_id.offer_id if matching else item_id
+                book.purge_offer(item_id)
+
+            if number % 100 == 0:
+                snapshots.append(book.get_market_snapshot())
+
+    threads = [Thread(target=work, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    item_ids = [item_id.offer_id if matching else item_id for ids in added_ids for item_id in ids]
+
+    assert len(set(item_ids)) == len(item_ids) == book.offer_id == 4000
+    assert len(book.asks) == len(book.bids) == 4 * (500 - 167)
+    assert len(book.offer_sides) == len(book.asks) + len(book.bids)
+
+    snapshot = book.get_market_snapshot()
+    assert sum(lot['quantity'] for lot in snapshot['asks']) == len(book.asks)
+    assert all(isinstance(snapshot['asks'], list) for snapshot in snapshots)
+
+
+def test_thread_safe_get_deltas() -> NoReturn:
+    """
+    Read deltas while offers are added from another thread and check,
+    that every delta is labeled with its own version
+    """
+    book = ThreadSafeOrderBook(100000, change_log=10000)
+    errors = []
+
+    def write() -> None:
+        for number in range(5000):
+            book.add_offer('asks' if number % 2 else 'bids', 100 + number % 10 if number % 2 else 90, 1)
+
+    def read() -> None:
+        try:
+            while writer.is_alive():
+                since_version = max(book.version - 5, 0)
+                deltas = book.get_deltas(since_version)
+
+                # every change adds one offer, so offer id of the change is its version
+                assert all(delta.offer_id == delta.version for delta in deltas.changes)
+
+        except Exception as error:
+            errors.append(error)
+
+    writer = Thread(target=write)
+    reader = Thread(target=read)
+    writer.start()
+    reader.start()
+    writer.join()
+    reader.join()
+
+    assert not errors
+    assert [delta.offer_id for delta in book.get_deltas(book.version - 3).changes] == [4998, 4999, 5000]
+
+
+def test_async_order_book() -> NoReturn:
+    """
+    Submit offers and cancellations from coroutines and receive market views
+    """
+    async def scenario() -> None:
+        front_end = AsyncOrderBook(depth=5)
+        subscription = front_end.subscribe()
+
+        ask_id, bid_id = await asyncio.gather(
+            front_end.add_offer('asks', 10, 1),
+            front_end.add_offer('bids', 9, 2),
+        )
+
+        market_view = await subscription.__anext__()
+        assert market_view.version == 2
+        assert [lot.offer_id for lot in market_view.asks] == [ask_id]
+        assert [lot.offer_id for lot in market_view.bids] == [bid_id]
+
+        purged, failed = await asyncio.gather(
+            front_end.purge_offer(ask_id),
+            front_end.purge_offer(100500),
+            return_exceptions=True,
+        )
+
+        assert purged == {'price': 10, 'quantity': 1}
+        assert isinstance(failed, NoElementException)
+
+        market_view = await subscription.__anext__()
+        assert market_view.version == 3
+        assert not market_view.asks
+
+        subscription.close()
+
+    asyncio.run(scenario())
+
+
+def test_async_subscription_close() -> NoReturn:
+    """
+    Close subscription while its consumer waits for a market view
+    """
+    async def scenario() -> None:
+        front_end = AsyncOrderBook(depth=5)
+        subscription = front_end.subscribe(max_pending=2)
+        received = []
+
+        async def consume() -> None:
+            async for market_view in subscription:
+                received.append(market_view.version)
+
+        consumer = asyncio.ensure_future(consume())
+        await front_end.add_offer('asks', 10, 1)
+        await asyncio.sleep(0)
+
+        subscription.close()
+        await asyncio.wait_for(consumer, 1)
+
+        assert received == [1]
+
+        # closed subscription does not receive views and stops at once
+        await front_end.add_offer('asks', 11, 1)
+        assert [market_view async for market_view in subscription] == []
+
+        with pytest.raises(ParamValueException):
+            front_end.subscribe(max_pending=0)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_deltas_rebuild_book(storage: str) -> NoReturn:
+    """
+    Apply changes of matching order book to a copy and check, that copy matches
+    """
+    book = OrderBook(200, storage=storage, matching=True)
+    copy_lots = {}
+    version = 0
+
+    for number in range(300):
+        book.add_offer(choice(['asks', 'bids']), randint(10, 20), randint(1, 10))
+
+        if number % 5 == 0 and book.offer_sides:
+            book.purge_offer(choice(list(book.offer_sides)))
+
+        if number % 20 == 0:
+            deltas = book.get_deltas(version)
+
+            for change in deltas.changes:
+                if change.action == 'purge':
+                    del copy_lots[change.offer_id]
+                else:
+                    copy_lots[change.offer_id] = (change.trade_type, change.price, change.quantity)
+
+            version = deltas.version
+
+    for change in book.get_deltas(version).changes:
+        if change.action == 'purge':
+            del copy_lots[change.offer_id]
+        else:
+            copy_lots[change.offer_id] = (change.trade_type, change.price, change.quantity)
+
+    assert copy_lots == {
+        item_id: (side.trade_type, side[item_id]['price'], side[item_id]['quantity'])
+        for item_id, side in book.offer_sides.items()
+    }
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_save_load_order_book(tmp_path, use_mmap: bool) -> NoReturn:
+    """
+    Save filled order book into binary file and load it back
+    """
+    book = OrderBook(100)
+
+    for _ in range(50):
+        book.add_offer(choice(['asks', 'bids']), choice([randint(10, 50), randint(10, 50) / 8]), randint(1, 100))
+
+    for offer_key in list(book.offer_sides)[::4]:
+        book.purge_offer(offer_key)
+
+    state_path = str(tmp_path / 'book.state')
+    assert save(book, state_path) == len(book.asks) + len(book.bids)
+    assert verify(state_path)
+
+    loaded_book = load(state_path, use_mmap=use_mmap)
+
+    assert loaded_book.depth == book.depth
+    assert loaded_book.offer_id == book.offer_id
+    assert loaded_book.get_market_view()[1:] == book.get_market_view()[1:]
+    assert loaded_book.get_market_snapshot() == book.get_market_snapshot()
+
+    for offer_key in book.offer_sides:
+        assert type(loaded_book.get_offers_data(offer_key)['price']) is type(book.get_offers_data(offer_key)['price'])
+
+
+@pytest.mark.parametrize('tick_size', [5, 0.01])
+def test_save_load_tick_size(tmp_path, tick_size) -> NoReturn:
+    """
+    Save order book with tick size into binary file and load it back
+    """
+    book = OrderBook(100, tick_size=tick_size)
+
+    for _ in range(50):
+        book.add_offer(choice(['asks', 'bids']), randint(1, 500) * tick_size, randint(1, 100))
+
+    state_path = str(tmp_path / 'book.state')
+    save(book, state_path)
+
+    loaded_book = load(state_path)
+
+    assert loaded_book.tick_size == tick_size
+    assert type(loaded_book.tick_size) is type(tick_size)
+    assert loaded_book.get_market_snapshot() == book.get_market_snapshot()
+
+
+def test_load_corrupted_state(tmp_path) -> NoReturn:
+    """
+    Load binary file with corrupted records
+    """
+    book = OrderBook()
+    book.add_offer('asks', 10, 1)
+
+    state_path = tmp_path / 'book.state'
+    save(book, str(state_path))
+
+    data = bytearray(state_path.read_bytes())
+    data[-1] ^= 0xFF
+    state_path.write_bytes(bytes(data))
+
+    assert not verify(str(state_path))
+
+    with pytest.raises(InvalidStateException):
+        load(str(state_path))
+
+    state_path.write_bytes(b'foo')
+
+    with pytest.raises(InvalidStateException):
+        load(str(state_path), use_mmap=True)
+
+    # empty file left by a crash can not be memory mapped
+    state_path.write_bytes(b'')
+
+    assert not verify(str(state_path))
+
+    for use_mmap in (False, True):
+        with pytest.raises(InvalidStateException):
+            load(str(state_path), use_mmap=use_mmap)
+
+
+def test_journal_recover(tmp_path) -> NoReturn:
+    """
+    Write changes of matching order book into journal with checkpoint and recover it
+    """
+    state_path = str(tmp_path / 'book.state')
+    journal_path = str(tmp_path / 'book.journal')
+
+    book = OrderBook(1000, matching=True)
+    journal = Journal(journal_path, sync_every=7)
+    book.attach_journal(journal)
+
+    for number in range(200):
+        book.add_offer(choice(['asks', 'bids']), randint(10, 20), randint(1, 10))
+
+        if number % 5 == 0 and book.offer_sides:
+            book.purge_offer(choice(list(book.offer_sides)))
+
+        if number == 120:
+            journal.checkpoint(book, state_path)
+
+    journal.close()
+
+    recovered_book = recover(state_path, journal_path)
+
+    assert recovered_book.offer_id == book.offer_id
+    assert recovered_book.matching
+    assert recovered_book.get_market_view()[1:] == book.get_market_view()[1:]
+
+    # journal continues sequence after reopening
+    with Journal(journal_path) as reopened_journal:
+        assert reopened_journal.sequence == journal.sequence
+
+
+def test_journal_recover_ladder_storage(tmp_path) -> NoReturn:
+    """
+    Recover order book with ladder storage and overflow policy from checkpoint and journal
+    """
+    state_path = str(tmp_path / 'book.state')
+    journal_path = str(tmp_path / 'book.journal')
+    book_options = {'storage': 'ladder', 'price_range': (1, 100), 'overflow': 'evict_worst', 'change_log': 50}
+
+    book = OrderBook(10, **book_options)
+    journal = Journal(journal_path)
+    book.attach_journal(journal)
+
+    for number in range(60):
+        book.add_offer(choice(['asks', 'bids']), randint(10, 90), randint(1, 10))
+
+        if number == 30:
+            journal.checkpoint(book, state_path)
+
+    journal.close()
+
+    recovered_book = recover(state_path, journal_path, **book_options)
+
+    assert isinstance(recovered_book.bids, LadderBookSide)
+    assert recovered_book.overflow == 'evict_worst'
+    assert recovered_book.changes.maxlen == 50
+    assert recovered_book.offer_id == book.offer_id
+    assert recovered_book.get_market_view()[1:] == book.get_market_view()[1:]
+
+
+def test_journal_recover_interrupted_checkpoint(tmp_path) -> NoReturn:
+    """
+    Recover order book, when checkpoint is saved, but journal is not reset yet
+    """
+    state_path = str(tmp_path / 'book.state')
+    journal_path = str(tmp_path / 'book.journal')
+
+    book = OrderBook()
+    journal = Journal(journal_path)
+    book.attach_journal(journal)
+
+    book.add_offer('asks', 10, 1)
+    book.add_offer('bids', 9, 2)
+    journal.sync()
+    save(book, state_path, journal.sequence)
+
+    book.purge_offer(1)
+    journal.close()
+
+    recovered_book = recover(state_path, journal_path)
+
+    assert recovered_book.get_market_snapshot() == book.get_market_snapshot()
+    assert recovered_book.offer_id == 2
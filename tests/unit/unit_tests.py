@@ -6,8 +6,11 @@ import pytest
 
 from order_book.depth_of_market import OrderBook
 from order_book.exceptions import (
-    InvalidDepthException, ParamTypeException, ParamValueException, NoElementException
+    InvalidDepthException, ParamTypeException, ParamValueException, NoElementException,
+    TradeTypeOverflowedException
 )
+from order_book.instrumentation import LatencyHistogram
+from order_book.threadsafe import ThreadSafeOrderBook
 
 
 def test_create_default_book(new_order_book: Callable[[], OrderBook]) -> NoReturn:
@@ -129,6 +132,17 @@ def test_add_offer_invalid_trade_type(new_order_book: Callable[[], OrderBook]) -
         book.add_offer(trade_type, price, quantity)
 
 
+@pytest.mark.parametrize('book_class', [OrderBook, ThreadSafeOrderBook])
+def test_add_offer_unhashable_trade_type(book_class: type) -> NoReturn:
+    """
+    Add new offer into unhashable trade type
+    """
+    book = book_class()
+
+    with pytest.raises(ParamValueException):
+        book.add_offer(['asks'], 1, 1)
+
+
 def test_add_offer_missing_trade_type(new_order_book: Callable[[], OrderBook]) -> NoReturn:
     """
     Add new offer without trade type
@@ -498,3 +512,906 @@ def test_get_market_snapshot_empty(new_order_book: Callable[[], OrderBook]) -> N
     assert not book.bids
     assert not book.asks
     assert book.offer_id == 0
+
+
+def test_best_prices_empty(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get best ask and bid prices of empty order book
+    """
+    book = new_order_book
+
+    assert book.best_ask() is None
+    assert book.best_bid() is None
+
+
+def test_best_prices(order_book_with_both_offers: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get best ask and bid prices of order book with offers
+    """
+    book = order_book_with_both_offers
+
+    assert book.best_ask() == 1
+    assert book.best_bid() == 2
+
+
+def test_get_market_view(order_book_with_both_offers: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get read-only market view with asks and bids data
+    """
+    book = order_book_with_both_offers
+
+    market_view = book.get_market_view()
+
+    assert market_view.version == book.version
+    assert isinstance(market_view.asks, tuple)
+    assert market_view.asks[0].offer_id == 0
+    assert market_view.asks[0].price == 1
+    assert market_view.asks[0].quantity == 1
+
+    assert isinstance(market_view.bids, tuple)
+    assert market_view.bids[0].price == 2
+    assert market_view.bids[0].quantity == 2
+
+    with pytest.raises(AttributeError):
+        market_view.asks[0].price = 100500
+
+
+def test_get_market_view_cached(order_book_with_ask_offer: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get market view twice and check, that the view is renewed only after change
+    """
+    book = order_book_with_ask_offer
+
+    market_view = book.get_market_view()
+    assert book.get_market_view() is market_view
+
+    book.add_offer('bids', 1, 1)
+    new_market_view = book.get_market_view()
+
+    assert new_market_view is not market_view
+    assert new_market_view.version == market_view.version + 1
+    # untouched side is shared between views
+    assert new_market_view.asks is market_view.asks
+
+
+def test_create_book_compact_storage() -> NoReturn:
+    """
+    Create new order book with compact storage
+    """
+    book = OrderBook(storage='compact')
+
+    assert book.depth == 20
+    assert book.offer_id == 0
+
+    assert not book.asks
+    assert not book.bids
+
+
+def test_create_book_invalid_storage() -> NoReturn:
+    """
+    Create new order book with unknown storage
+    """
+    with pytest.raises(ParamValueException):
+        OrderBook(storage='foo')
+
+
+def test_compact_storage_reuses_slots() -> NoReturn:
+    """
+    Purge offer from compact storage and check, that its slot is reused
+    """
+    book = OrderBook(storage='compact')
+
+    first_id = book.add_offer('asks', 1, 1)
+    book.purge_offer(first_id)
+    second_id = book.add_offer('asks', 2, 2)
+
+    assert len(book.asks.prices) == 1
+    assert book.get_offers_data(second_id) == {'price': 2, 'quantity': 2}
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_add_offer_quantity_out_of_range(storage: str) -> NoReturn:
+    """
+    Add offer with quantity, which does not fit into 64 bits, and check, that the order book is not changed
+    """
+    book = OrderBook(storage=storage)
+
+    with pytest.raises(ParamValueException):
+        book.add_offer('asks', 10, 2 ** 63)
+
+    # trusted offers are not validated, but compact storage still rejects them before it is changed
+    if storage == 'compact':
+        with pytest.raises(ParamValueException):
+            book.add_trusted_offer('asks', 10, 2 ** 63)
+
+    item_id = book.add_offer('asks', 11, 5)
+
+    assert book.get_offers_data(item_id) == {'price': 11, 'quantity': 5}
+    assert book.get_market_snapshot() == {'asks': [{'price': 11, 'quantity': 5}], 'bids': []}
+
+
+def test_add_offers(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Add batch of offers into asks and bids
+    """
+    book = new_order_book
+
+    item_ids = book.add_offers([('asks', 1, 1), ('bids', 2.5, 2), ('asks', 3, 3)])
+
+    assert list(item_ids) == [1, 2, 3]
+    assert book.offer_id == 3
+
+    assert book.asks[1] == {'price': 1, 'quantity': 1}
+    assert book.bids[2] == {'price': 2.5, 'quantity': 2}
+    assert book.asks[3] == {'price': 3, 'quantity': 3}
+
+
+def test_add_offers_invalid_offer(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Add batch of offers with invalid offer and check, that order book is unchanged
+    """
+    book = new_order_book
+
+    with pytest.raises(ParamTypeException):
+        book.add_offers([('asks', 1, 1), ('bids', '1', 1)])
+
+    with pytest.raises(ParamValueException):
+        book.add_offers([('asks', 1, 1), ('foo', 1, 1)])
+
+    with pytest.raises(ParamValueException):
+        book.add_offers([('asks', 1, 1), ('bids', 1, 0)])
+
+    with pytest.raises(ParamTypeException):
+        book.add_offers([('asks', 1, 1), ('bids', 1)])
+
+    assert not book.asks
+    assert not book.bids
+    assert book.offer_id == 0
+
+
+def test_purge_offers(order_book_with_ask_offer: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Purge batch of offers from asks and bids
+    """
+    book = order_book_with_ask_offer
+
+    book.add_offer('bids', 2, 2)
+    book.add_offer('asks', 3, 3)
+
+    purged_items = book.purge_offers([0, 3])
+
+    assert purged_items == [{'price': 1, 'quantity': 1}, {'price': 3, 'quantity': 3}]
+    assert not book.asks
+    assert book.bids
+
+
+def test_purge_offers_missing_item(order_book_with_ask_offer: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Purge batch of offers with missing or repeated id and check, that order book is unchanged
+    """
+    book = order_book_with_ask_offer
+
+    with pytest.raises(NoElementException):
+        book.purge_offers([0, 100500])
+
+    with pytest.raises(NoElementException):
+        book.purge_offers([0, 0])
+
+    with pytest.raises(ParamTypeException):
+        book.purge_offers([0, '1'])
+
+    assert book.asks
+
+
+def test_get_market_snapshot_arrays(order_book_with_both_offers: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get snapshot with asks and bids data as NumPy arrays
+    """
+    numpy = pytest.importorskip('numpy')
+    book = order_book_with_both_offers
+
+    market_snapshot = book.get_market_snapshot_arrays()
+
+    assert market_snapshot['asks'].price.dtype == numpy.float64
+    assert market_snapshot['asks'].quantity.dtype == numpy.int64
+    assert list(market_snapshot['asks'].price) == [1]
+    assert list(market_snapshot['asks'].quantity) == [1]
+    assert list(market_snapshot['bids'].price) == [2]
+    assert list(market_snapshot['bids'].quantity) == [2]
+
+
+def test_get_market_snapshot_arrays_empty(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get empty snapshot as NumPy arrays
+    """
+    pytest.importorskip('numpy')
+    book = new_order_book
+
+    market_snapshot = book.get_market_snapshot_arrays()
+
+    assert not market_snapshot['asks'].price.size
+    assert not market_snapshot['bids'].quantity.size
+
+
+def test_add_offer_matching_no_cross() -> NoReturn:
+    """
+    Add offers, which do not cross, into matching order book
+    """
+    book = OrderBook(matching=True)
+
+    book.add_offer('asks', 10, 5)
+    result = book.add_offer('bids', 9, 5)
+
+    assert result.offer_id == 2
+    assert result.fills == []
+    assert result.remaining == 5
+    assert book.bids[2] == {'price': 9, 'quantity': 5}
+
+
+def test_add_offer_matching_partial_fill() -> NoReturn:
+    """
+    Add bid offer, which partially executes resting ask offer
+    """
+    book = OrderBook(matching=True)
+
+    book.add_offer('asks', 10, 5)
+    result = book.add_offer('bids', 11, 3)
+
+    assert result.offer_id == 2
+    assert result.fills == [(1, 10, 3)]
+    assert result.remaining == 0
+
+    assert book.asks[1] == {'price': 10, 'quantity': 2}
+    assert not book.bids
+
+
+def test_add_offer_matching_sweep() -> NoReturn:
+    """
+    Add ask offer, which executes several bid levels and rests its remainder
+    """
+    book = OrderBook(matching=True)
+
+    book.add_offer('bids', 10, 1)
+    book.add_offer('bids', 12, 2)
+    book.add_offer('bids', 12, 3)
+    book.add_offer('bids', 9, 4)
+
+    result = book.add_offer('asks', 10.0, 10)
+
+    assert result.fills == [(2, 12, 2), (3, 12, 3), (1, 10, 1)]
+    assert result.remaining == 4
+
+    assert list(book.bids.keys()) == [4]
+    assert book.asks[result.offer_id] == {'price': 10.0, 'quantity': 4}
+    assert book.best_bid() < book.best_ask()
+
+
+def test_contains(order_book_with_both_offers: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Check offers presence in order book
+    """
+    book = order_book_with_both_offers
+
+    item_id = book.add_offer('bids', 1, 1)
+
+    assert book.contains(0)
+    assert book.contains(item_id)
+    assert not book.contains(100500)
+
+    book.purge_offer(item_id)
+
+    assert not book.contains(item_id)
+
+
+def test_side_of(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get trade type of ask and bid offers
+    """
+    book = new_order_book
+
+    ask_id = book.add_offer('asks', 1, 1)
+    bid_id = book.add_offer('bids', 1, 1)
+
+    assert book.side_of(ask_id) == 'asks'
+    assert book.side_of(bid_id) == 'bids'
+
+    with pytest.raises(NoElementException):
+        book.side_of(100500)
+
+
+def test_get_market_depth(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get aggregated snapshot of the best price levels
+    """
+    book = new_order_book
+
+    book.add_offers([
+        ('asks', 2, 1), ('asks', 1, 2), ('asks', 2, 3), ('asks', 3, 4),
+        ('bids', 1, 1), ('bids', 0.5, 2), ('bids', 1, 3),
+    ])
+
+    market_depth = book.get_market_depth(2)
+
+    assert market_depth['asks'] == [{'price': 1, 'quantity': 2}, {'price': 2, 'quantity': 4}]
+    assert market_depth['bids'] == [{'price': 1, 'quantity': 4}, {'price': 0.5, 'quantity': 2}]
+
+
+def test_get_market_depth_invalid_levels(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get aggregated snapshot with invalid number of levels
+    """
+    book = new_order_book
+
+    with pytest.raises(ParamTypeException):
+        book.get_market_depth('1')
+
+    with pytest.raises(ParamValueException):
+        book.get_market_depth(0)
+
+
+def test_get_deltas(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get changes of order book since known version
+    """
+    book = new_order_book
+
+    ask_id = book.add_offer('asks', 10, 1)
+    version = book.version
+    bid_id = book.add_offer('bids', 9, 2)
+    book.purge_offer(ask_id)
+
+    deltas = book.get_deltas(version)
+
+    assert deltas.version == book.version == version + 2
+    assert deltas.market_view is None
+    assert deltas.changes == [
+        (version + 1, 'add', 'bids', bid_id, 9, 2),
+        (version + 2, 'purge', 'asks', ask_id, 10, 1),
+    ]
+
+    assert book.get_deltas(book.version).changes == []
+    assert len(book.get_deltas(0).changes) == 3
+
+
+def test_get_deltas_truncated() -> NoReturn:
+    """
+    Get changes, which are not in the change log anymore
+    """
+    book = OrderBook(change_log=2)
+
+    for _ in range(3):
+        book.add_offer('asks', 10, 1)
+
+    assert len(book.get_deltas(1).changes) == 2
+
+    deltas = book.get_deltas(0)
+
+    assert deltas.changes is None
+    assert deltas.market_view is book.get_market_view()
+
+    assert OrderBook(change_log=0).get_deltas(0).changes is None
+
+
+def test_get_deltas_invalid_version(order_book_with_ask_offer: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get changes since invalid version
+    """
+    book = order_book_with_ask_offer
+
+    with pytest.raises(ParamTypeException):
+        book.get_deltas('1')
+
+    with pytest.raises(ParamValueException):
+        book.get_deltas(book.version + 1)
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_amend_offer_reduce_quantity(storage: str) -> NoReturn:
+    """
+    Reduce quantity of offer keeping its place in the queue
+    """
+    book = OrderBook(storage=storage)
+
+    first_id = book.add_offer('asks', 10, 5)
+    second_id = book.add_offer('asks', 10, 3)
+
+    assert book.amend_offer(first_id, quantity=2) == {'price': 10, 'quantity': 2}
+    assert [lot.offer_id for lot in book.asks.view()] == [first_id, second_id]
+    assert book.get_market_depth(1)['asks'] == [{'price': 10, 'quantity': 5}]
+
+
+def test_amend_offer_requeue(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Increase quantity and change price of offer keeping its id
+    """
+    book = new_order_book
+
+    first_id = book.add_offer('bids', 10, 5)
+    second_id = book.add_offer('bids', 10, 3)
+
+    book.amend_offer(first_id, quantity=6)
+    assert [lot.offer_id for lot in book.bids.view()] == [second_id, first_id]
+
+    assert book.amend_offer(second_id, price=11, quantity=1) == {'price': 11, 'quantity': 1}
+    assert book.best_bid() == 11
+    assert book.get_market_depth()['bids'] == [
+        {'price': 11, 'quantity': 1},
+        {'price': 10, 'quantity': 6},
+    ]
+    assert book.offer_id == 2
+
+
+def test_amend_offer_invalid_params(order_book_with_ask_offer: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Amend offer with invalid params
+    """
+    book = order_book_with_ask_offer
+    item_id = book.add_offer('asks', 10, 1)
+
+    with pytest.raises(ParamTypeException):
+        book.amend_offer(str(item_id), quantity=2)
+
+    with pytest.raises(NoElementException):
+        book.amend_offer(item_id + 1, quantity=2)
+
+    with pytest.raises(ParamTypeException):
+        book.amend_offer(item_id, quantity=2.0)
+
+    with pytest.raises(ParamValueException):
+        book.amend_offer(item_id, price=0)
+
+    assert book.get_offers_data(item_id) == {'price': 10, 'quantity': 1}
+
+
+def test_amend_offer_matching() -> NoReturn:
+    """
+    Move price of offer across the opposite trade type in matching order book
+    """
+    book = OrderBook(matching=True)
+
+    book.add_offer('asks', 10, 2)
+    bid_id = book.add_offer('bids', 9, 5).offer_id
+
+    result = book.amend_offer(bid_id, price=10)
+
+    assert result == (bid_id, [(1, 10, 2)], 3)
+    assert not book.asks
+    assert book.bids[bid_id] == {'price': 10, 'quantity': 3}
+
+
+def test_vwap_for_quantity(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get average execution price of quantity of both trade types
+    """
+    book = new_order_book
+
+    book.add_offers([('asks', 10, 2), ('asks', 12, 3), ('asks', 11, 1)])
+    book.add_offers([('bids', 9, 4), ('bids', 8, 4)])
+
+    assert book.vwap_for_quantity('asks', 1) == 10
+    assert book.vwap_for_quantity('asks', 4) == (10 * 2 + 11 + 12) / 4
+    assert book.vwap_for_quantity('asks', 6) == (10 * 2 + 11 + 12 * 3) / 6
+    assert book.vwap_for_quantity('asks', 7) is None
+
+    assert book.vwap_for_quantity('bids', 4) == 9
+    assert book.vwap_for_quantity('bids', 6) == (9 * 4 + 8 * 2) / 6
+
+    book.amend_offer(1, quantity=1)
+    book.purge_offer(3)
+    assert book.vwap_for_quantity('asks', 2) == 11
+
+    with pytest.raises(ParamValueException):
+        book.vwap_for_quantity('trades', 1)
+
+    with pytest.raises(ParamValueException):
+        book.vwap_for_quantity('asks', 0)
+
+
+def test_quantity_within(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get quantity within price band from mid price
+    """
+    book = new_order_book
+
+    assert book.quantity_within('asks', 1) == 0
+
+    book.add_offers([('asks', 11, 1), ('asks', 12, 2), ('asks', 14, 4)])
+    assert book.quantity_within('asks', 1) == 3
+
+    book.add_offers([('bids', 9, 1), ('bids', 8, 2), ('bids', 7, 4)])
+
+    assert book.quantity_within('asks', 1) == 1
+    assert book.quantity_within('asks', 2) == 3
+    assert book.quantity_within('bids', 2) == 3
+    assert book.quantity_within('bids', 10) == 7
+
+    with pytest.raises(ParamTypeException):
+        book.quantity_within('bids', '1')
+
+    with pytest.raises(ParamValueException):
+        book.quantity_within('bids', -1)
+
+
+def test_cumulative_depth(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Get cumulative quantity of the best price levels
+    """
+    book = new_order_book
+
+    book.add_offers([('bids', 9, 1), ('bids', 8, 2), ('bids', 9, 4)])
+
+    assert book.cumulative_depth('bids') == [
+        {'price': 9, 'quantity': 5},
+        {'price': 8, 'quantity': 7},
+    ]
+    assert book.cumulative_depth('bids', 1) == [{'price': 9, 'quantity': 5}]
+    assert book.cumulative_depth('asks') == []
+
+
+def test_create_book_tick_size() -> NoReturn:
+    """
+    Create order book with invalid tick size
+    """
+    with pytest.raises(ParamTypeException):
+        OrderBook(tick_size='0.01')
+
+    with pytest.raises(ParamValueException):
+        OrderBook(tick_size=0)
+
+
+def test_tick_size() -> NoReturn:
+    """
+    Add offers into order book with decimal tick size
+    """
+    book = OrderBook(tick_size=0.1)
+
+    ask_id = book.add_offer('asks', 0.3, 1)
+    book.add_offer('asks', 0.1 + 0.2, 2)
+    bid_id = book.add_offer('bids', 0.2, 3)
+
+    assert book.asks.levels.prices == [3]
+    assert book.get_offers_data(ask_id) == {'price': 0.3, 'quantity': 1}
+    assert book.get_market_snapshot() == {
+        'asks': [{'price': 0.3, 'quantity': 1}, {'price': 0.3, 'quantity': 2}],
+        'bids': [{'price': 0.2, 'quantity': 3}],
+    }
+    assert book.get_market_depth(1)['asks'] == [{'price': 0.3, 'quantity': 3}]
+    assert book.get_market_view().bids == ((bid_id, 0.2, 3),)
+    assert book.best_ask() == 0.3
+    assert book.amend_offer(bid_id, price=0.1) == {'price': 0.1, 'quantity': 3}
+    assert book.purge_offer(ask_id) == {'price': 0.3, 'quantity': 1}
+
+    with pytest.raises(ParamValueException):
+        book.add_offer('asks', 0.25, 1)
+
+    with pytest.raises(ParamValueException):
+        book.add_offer('asks', 0.01, 1)
+
+
+def test_tick_size_integer_matching() -> NoReturn:
+    """
+    Execute offers in matching order book with integer tick size
+    """
+    book = OrderBook(matching=True, tick_size=5)
+
+    book.add_offer('asks', 100, 2)
+    result = book.add_offer('bids', 105, 3)
+
+    assert result.fills == [(1, 100, 2)]
+    assert book.best_bid() == 105
+    assert book.bids.levels.prices == [21]
+
+
+def test_create_book_ladder_storage() -> NoReturn:
+    """
+    Create order book with ladder storage and invalid price range
+    """
+    book = OrderBook(storage='ladder', price_range=(1, 100))
+
+    assert book.best_ask() is None
+    assert book.get_market_snapshot() == {'asks': [], 'bids': []}
+
+    with pytest.raises(ParamValueException):
+        OrderBook(storage='ladder')
+
+    with pytest.raises(ParamValueException):
+        OrderBook(price_range=(1, 100))
+
+    with pytest.raises(ParamTypeException):
+        OrderBook(storage='ladder', price_range=100)
+
+    with pytest.raises(ParamValueException):
+        OrderBook(storage='ladder', price_range=(1.5, 100))
+
+    with pytest.raises(ParamValueException):
+        OrderBook(storage='ladder', price_range=(100, 1))
+
+
+def test_ladder_storage_level_quantity_overflow() -> NoReturn:
+    """
+    Add offer, which total quantity of its price level does not fit into 64 bits,
+    and check, that the order book is not changed
+    """
+    book = OrderBook(storage='ladder', price_range=(1, 100))
+
+    first_id = book.add_offer('asks', 10, 2 ** 62)
+
+    with pytest.raises(ParamValueException):
+        book.add_offer('asks', 10, 2 ** 62)
+
+    assert not book.contains(first_id + 1)
+    assert book.get_market_depth(1)['asks'] == [{'price': 10, 'quantity': 2 ** 62}]
+    assert book.get_market_snapshot()['asks'] == [{'price': 10, 'quantity': 2 ** 62}]
+
+    # prefix sums of notionals do not fit into 64 bits either
+    book.add_offer('asks', 11, 2 ** 62)
+    assert book.vwap_for_quantity('asks', 2 ** 63) == 10.5
+
+
+def test_ladder_storage_tick_size() -> NoReturn:
+    """
+    Add offers into ladder order book with decimal tick size
+    """
+    book = OrderBook(storage='ladder', tick_size=0.01, price_range=(99.5, 100.5))
+
+    ask_id = book.add_offer('asks', 100.01, 2)
+    book.add_offer('asks', 100.03, 1)
+    book.add_offer('bids', 99.99, 3)
+
+    assert book.asks.levels.min_price == 9950
+    assert book.best_ask() == 100.01
+    assert book.get_market_depth(1) == {
+        'asks': [{'price': 100.01, 'quantity': 2}],
+        'bids': [{'price': 99.99, 'quantity': 3}],
+    }
+
+    book.purge_offer(ask_id)
+    assert book.best_ask() == 100.03
+
+    with pytest.raises(ParamValueException):
+        book.add_offer('asks', 100.51, 1)
+
+    with pytest.raises(ParamValueException):
+        book.amend_offer(ask_id + 1, price=99.49)
+
+
+def test_create_book_invalid_overflow() -> NoReturn:
+    """
+    Create order book with unknown overflow policy
+    """
+    with pytest.raises(ParamValueException):
+        OrderBook(overflow='ignore')
+
+
+def test_overflow_evict_worst() -> NoReturn:
+    """
+    Add offers into full trade types with evict_worst overflow policy
+    """
+    book = OrderBook(2, overflow='evict_worst')
+
+    book.add_offers([('asks', 10, 1), ('asks', 12, 2), ('bids', 9, 3), ('bids', 8, 4)])
+    assert book.take_evicted() == []
+
+    book.add_offer('asks', 11, 5)
+    book.add_offer('bids', 8, 6)
+    last_bid_id = book.add_offer('bids', 9, 7)
+
+    assert book.get_market_snapshot() == {
+        'asks': [{'price': 10, 'quantity': 1}, {'price': 11, 'quantity': 5}],
+        'bids': [{'price': 9, 'quantity': 3}, {'price': 9, 'quantity': 7}],
+    }
+    assert book.take_evicted() == [
+        (2, 'asks', 12, 2),
+        (6, 'bids', 8, 6),
+        (4, 'bids', 8, 4),
+    ]
+    assert book.take_evicted() == []
+    assert book.contains(last_bid_id)
+
+    # the worst priced offer evicts itself
+    worst_ask_id = book.add_offer('asks', 12, 8)
+
+    assert not book.contains(worst_ask_id)
+    assert book.take_evicted() == [(worst_ask_id, 'asks', 12, 8)]
+
+
+def test_overflow_eviction_log() -> NoReturn:
+    """
+    Keep only the latest evictions, when they are not taken
+    """
+    book = OrderBook(1, overflow='evict_worst', eviction_log=2)
+
+    for price in range(10, 15):
+        book.add_offer('asks', price, 1)
+
+    assert book.take_evicted() == [(4, 'asks', 13, 1), (5, 'asks', 14, 1)]
+
+    with pytest.raises(ParamTypeException):
+        OrderBook(eviction_log=1.5)
+
+    with pytest.raises(ParamValueException):
+        OrderBook(eviction_log=-1)
+
+
+def test_overflow_reject_if_worse() -> NoReturn:
+    """
+    Add offers into full trade type with reject_if_worse overflow policy
+    """
+    book = OrderBook(2, overflow='reject_if_worse')
+
+    book.add_offers([('bids', 9, 1), ('bids', 8, 2)])
+
+    with pytest.raises(TradeTypeOverflowedException):
+        book.add_offer('bids', 8, 3)
+
+    with pytest.raises(TradeTypeOverflowedException):
+        book.add_offer('bids', 7, 3)
+
+    item_id = book.add_offer('bids', 8.5, 3)
+
+    assert book.take_evicted() == [(2, 'bids', 8, 2)]
+    assert book.best_bid() == 9
+    assert book.contains(item_id)
+
+
+def test_overflow_evict_worst_matching() -> NoReturn:
+    """
+    Place remainder of crossing offer into full trade type with evict_worst overflow policy
+    """
+    book = OrderBook(1, matching=True, overflow='evict_worst')
+
+    book.add_offer('asks', 10, 1)
+    book.add_offer('bids', 8, 1)
+    result = book.add_offer('bids', 10, 3)
+
+    assert result.fills == [(1, 10, 1)]
+    assert book.bids[result.offer_id] == {'price': 10, 'quantity': 2}
+    assert book.take_evicted() == [(2, 'bids', 8, 1)]
+
+
+def test_instrumentation(new_order_book: Callable[[], OrderBook]) -> NoReturn:
+    """
+    Count calls and record latencies of order book methods
+    """
+    book = new_order_book
+
+    assert book.stats() == {
+        'sides': {'asks': {'offers': 0, 'levels': 0}, 'bids': {'offers': 0, 'levels': 0}},
+    }
+
+    book.enable_instrumentation()
+
+    item_id = book.add_offer('asks', 10, 1)
+    book.add_offer('asks', 11, 2)
+    book.get_offers_data(item_id)
+    snapshot = book.get_market_snapshot()
+
+    with pytest.raises(NoElementException):
+        book.purge_offer(item_id + 10)
+
+    stats = book.stats()
+
+    assert snapshot == {'asks': [{'price': 10, 'quantity': 1}, {'price': 11, 'quantity': 2}], 'bids': []}
+    assert stats['sides']['asks'] == {'offers': 2, 'levels': 2}
+    assert stats['methods']['add_offer']['count'] == 2
+    assert stats['methods']['purge_offer']['count'] == 1
+    assert stats['methods']['get_market_snapshot']['count'] == 1
+    assert stats['snapshot']['copy']['count'] == 1
+    assert 0 < stats['methods']['add_offer']['p50_ns'] <= stats['methods']['add_offer']['max_ns']
+
+    book.disable_instrumentation()
+
+    assert 'add_offer' not in vars(book)
+    assert 'methods' not in book.stats()
+
+
+def test_latency_histogram() -> NoReturn:
+    """
+    Record latencies into fixed size histogram
+    """
+    histogram = LatencyHistogram()
+
+    for value in range(1, 1001):
+        histogram.record(value)
+
+    histogram.record(10 ** 15)
+
+    assert histogram.count == 1001
+    assert histogram.max == 10 ** 15
+    assert histogram.percentile(0) == 1
+    assert 500 <= histogram.percentile(50) <= 500 * 1.07
+    assert 990 <= histogram.percentile(99) <= 990 * 1.07
+    assert histogram.percentile(100) == 10 ** 15
+
+
+@pytest.mark.parametrize('options', [{}, {'matching': True}, {'tick_size': 0.5}])
+def test_add_trusted_offer(options: dict) -> NoReturn:
+    """
+    Add offers with trusted path and check, that the order book is the same as with validated path
+    """
+    validated_book = OrderBook(**options)
+    trusted_book = OrderBook(**options)
+
+    for trade_type, price, quantity in [('asks', 10.5, 2), ('bids', 9, 1), ('bids', 11, 3), ('asks', 10.5, 1)]:
+        assert trusted_book.add_trusted_offer(trade_type, price, quantity) == validated_book.add_offer(
+            trade_type, price, quantity
+        )
+
+    assert trusted_book.get_market_snapshot() == validated_book.get_market_snapshot()
+    assert trusted_book.offer_id == validated_book.offer_id == 4
+
+
+def test_add_trusted_offer_overflow() -> NoReturn:
+    """
+    Add offer with trusted path into full trade type
+    """
+    book = OrderBook(1)
+    book.add_trusted_offer('asks', 10, 1)
+
+    with pytest.raises(TradeTypeOverflowedException):
+        book.add_trusted_offer('asks', 11, 1)
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact'])
+def test_top_of_book(storage: str) -> NoReturn:
+    """
+    Get the best offers of both trade types
+    """
+    book = OrderBook(storage=storage)
+
+    book.add_offers([('asks', 12, 1), ('asks', 10, 2), ('asks', 10, 3), ('asks', 11, 4)])
+    book.add_offers([('bids', 8, 5), ('bids', 9, 6), ('bids', 9, 7)])
+
+    assert book.top_of_book(3) == {
+        'asks': [{'price': 10, 'quantity': 2}, {'price': 10, 'quantity': 3}, {'price': 11, 'quantity': 4}],
+        'bids': [{'price': 9, 'quantity': 6}, {'price': 9, 'quantity': 7}, {'price': 8, 'quantity': 5}],
+    }
+    assert book.top_of_book(1)['bids'] == [{'price': 9, 'quantity': 6}]
+    assert len(book.top_of_book(10)['asks']) == 4
+
+    # top of book must not share lots with the book
+    book.top_of_book(1)['asks'][0]['quantity'] = 100500
+    assert book.get_offers_data(2)['quantity'] == 2
+
+    with pytest.raises(ParamTypeException):
+        book.top_of_book('1')
+
+    with pytest.raises(ParamValueException):
+        book.top_of_book(0)
+
+
+@pytest.mark.parametrize('storage', ['dict', 'compact', 'ladder'])
+@pytest.mark.parametrize('thread_safe', [False, True])
+def test_get_market_snapshot_best_first(storage: str, thread_safe: bool) -> NoReturn:
+    """
+    Get best first market snapshot: bids from the highest price, offers with equal price by arrival
+    """
+    book_class = ThreadSafeOrderBook if thread_safe else OrderBook
+    book = book_class(storage=storage, price_range=(1, 100) if storage == 'ladder' else None)
+
+    book.add_offers([('asks', 12, 1), ('asks', 10, 2), ('asks', 10, 3)])
+    book.add_offers([('bids', 8, 4), ('bids', 9, 5), ('bids', 8, 6), ('bids', 9, 7)])
+
+    expected = {
+        'asks': [{'price': 10, 'quantity': 2}, {'price': 10, 'quantity': 3}, {'price': 12, 'quantity': 1}],
+        'bids': [
+            {'price': 9, 'quantity': 5}, {'price': 9, 'quantity': 7},
+            {'price': 8, 'quantity': 4}, {'price': 8, 'quantity': 6},
+        ],
+    }
+
+    assert book.get_market_snapshot(best_first=True) == expected
+    # default snapshot is not affected
+    assert book.get_market_snapshot()['bids'][0] == {'price': 8, 'quantity': 4}
+
+    book.enable_instrumentation()
+    assert book.get_market_snapshot(True) == expected
+    assert book.stats()['methods']['get_market_snapshot']['count'] == 1
+
+    with pytest.raises(ParamTypeException):
+        book.get_market_snapshot(best_first=1)
+
+    book.disable_instrumentation()
+
+    with pytest.raises(ParamTypeException):
+        book.get_market_snapshot(best_first='yes')